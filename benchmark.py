@@ -0,0 +1,216 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import game_logic as gl
+
+DEFAULT_SIZES = ['9x9', '30x16', '100x100', '500x500', '1000x1000', '2000x2000']
+DEFAULT_DENSITIES = [0.05, 0.15, 0.2]
+# Number of cells the cheap single-cell actions are repeated over inside one timed run
+BATCH = 1000
+
+
+def _new_game(size: tuple, mines: int, seed: int, setup: bool = True) -> gl.Game:
+    game = gl.Game(size, mines, seed=seed, verbose=False)
+    if setup:
+        game.setup(_center(size))
+        game.first_click = False
+    return game
+
+
+def _center(size: tuple) -> tuple:
+    return size[0] // 2, size[1] // 2
+
+
+def _covered_cells(game: gl.Game, count: int) -> list:
+    cells = np.flatnonzero(game.state == gl.UNEXPLORED_CODE)[:count]
+    return [divmod(int(cell), game.size[1]) for cell in cells]
+
+
+# Every case prepares a fresh game outside the timer and returns (timed function, operations it runs)
+
+def case_generate_board(size: tuple, mines: int, seed: int) -> tuple:
+    game = _new_game(size, mines, seed, setup=False)
+    return lambda: game.generate_board(_center(size)), 1
+
+
+def case_generate_neighbors_board(size: tuple, mines: int, seed: int) -> tuple:
+    game = _new_game(size, mines, seed)
+    return lambda: game.generate_neighbors_board(raw=True), 1
+
+
+def case_expand_empty_cells(size: tuple, mines: int, seed: int) -> tuple:
+    game = _new_game(size, mines, seed)
+    center = _center(size)
+    game.state[center] = game.neighbor_counts[center]
+    return lambda: game.expand_empty_cells(center), 1
+
+
+def case_open(size: tuple, mines: int, seed: int) -> tuple:
+    game = _new_game(size, mines, seed)
+    return lambda: game.do_action(_center(size), 'o'), 1
+
+
+def case_flag(size: tuple, mines: int, seed: int) -> tuple:
+    game = _new_game(size, mines, seed)
+    cells = _covered_cells(game, BATCH)
+
+    def run() -> None:
+        for pos in cells:
+            game.do_action(pos, 'f')
+    return run, len(cells)
+
+
+def case_flag_batch(size: tuple, mines: int, seed: int) -> tuple:
+    game = _new_game(size, mines, seed)
+    cells = _covered_cells(game, BATCH)
+    actions = [gl.FLAG_ACTION] * len(cells)
+    return lambda: game.do_actions(cells, actions), len(cells)
+
+
+def case_unflag(size: tuple, mines: int, seed: int) -> tuple:
+    game = _new_game(size, mines, seed)
+    cells = _covered_cells(game, BATCH)
+    for pos in cells:
+        game.do_action(pos, 'f')
+
+    def run() -> None:
+        for pos in cells:
+            game.do_action(pos, 'r')
+    return run, len(cells)
+
+
+def case_win_check(size: tuple, mines: int, seed: int) -> tuple:
+    # Unflagging a cell without a flag changes nothing, so the call costs only the win/loss check
+    game = _new_game(size, mines, seed)
+    pos = _covered_cells(game, 1)[0]
+
+    def run() -> None:
+        for _ in range(BATCH):
+            game.do_action(pos, 'r')
+    return run, BATCH
+
+
+CASES = {
+    'generate_board': case_generate_board,
+    'generate_neighbors_board': case_generate_neighbors_board,
+    'expand_empty_cells': case_expand_empty_cells,
+    'open': case_open,
+    'flag': case_flag,
+    'flag_batch': case_flag_batch,
+    'unflag': case_unflag,
+    'win_check': case_win_check,
+}
+
+
+def measure(case: str, size: tuple, density: float, seed: int, warmup: int, repeat: int) -> dict:
+    """Times one case on one board configuration; every run gets a freshly prepared game."""
+    available = size[0] * size[1] - (2 * gl.SAFE_RADIUS + 1) ** 2
+    mines = min(max(int(size[0] * size[1] * density), 1), available)
+    prepare = CASES[case]
+
+    for _ in range(warmup):
+        prepare(size, mines, seed)[0]()
+
+    timings = []
+    for _ in range(repeat):
+        run, ops = prepare(size, mines, seed)
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) / ops)
+
+    # Peak memory comes from a separate run, as tracing slows numpy allocations down
+    run, _ = prepare(size, mines, seed)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'case': case,
+        'size': f'{size[0]}x{size[1]}',
+        'density': density,
+        'mines': mines,
+        'ops': ops,
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'mean_s': statistics.fmean(timings),
+        'peak_bytes': peak,
+    }
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """Rows slower than the baseline median by more than threshold (0.25 is 25%)."""
+    reference = {(row['case'], row['size'], row['density']): row for row in baseline}
+    regressions = []
+    for row in results:
+        old = reference.get((row['case'], row['size'], row['density']))
+        if old is None or old['median_s'] <= 0:
+            continue
+        ratio = row['median_s'] / old['median_s']
+        if ratio > 1 + threshold:
+            regressions.append(dict(row, baseline_median_s=old['median_s'], ratio=ratio))
+    return regressions
+
+
+def _parse_size(text: str) -> tuple:
+    rows, cols = text.lower().split('x')
+    return int(rows), int(cols)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks of the game_logic hot paths')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help='board sizes as ROWSxCOLS')
+    parser.add_argument('--densities', nargs='+', type=float, default=DEFAULT_DENSITIES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown against the baseline before failing')
+    args = parser.parse_args()
+
+    results = []
+    for size in map(_parse_size, args.sizes):
+        for density in args.densities:
+            for case in args.cases:
+                row = measure(case, size, density, args.seed, args.warmup, args.repeat)
+                results.append(row)
+                print(f"{row['case']:<26}{row['size']:>11}{density:>6.2f}"
+                      f"{row['median_s'] * 1e6:>14.1f} us{row['peak_bytes'] / 2 ** 20:>10.1f} MiB")
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'seed': args.seed,
+            'warmup': args.warmup,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.threshold)
+        for row in regressions:
+            print(f"REGRESSION {row['case']} {row['size']} {row['density']}: "
+                  f"{row['baseline_median_s'] * 1e6:.1f} us -> {row['median_s'] * 1e6:.1f} us ({row['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
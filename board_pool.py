@@ -0,0 +1,269 @@
+"""
+Background factory of pre-generated boards.
+
+A BoardPool keeps a bounded queue of finished boards per (size, mines) configuration and refills it on
+worker threads, optionally handing the generation to a process pool. Game(pool=...) pulls its board
+from here in setup, so the first click no longer pays for generation.
+
+Plain boards are drawn with their mines uniformly over the whole board. At take time the mines inside
+the safe zone of the first click are moved to uniformly chosen free cells outside it, which gives
+exactly the distribution of generate_mine_mask.
+
+With no_guess=True, a board is only queued once Solver.play_logically wins it from a zero cell without
+guessing. Clicking any zero cell of that opening reveals the same cells, so the whole opening is a valid
+first click. The other openings of the board are tried as well, and every one it is won from is added,
+which is several times the cells of a single opening. Mirror images, and transposes of square boards,
+keep the deductions, so take matches the click against every orientation of every queued board and only
+generates a board on the spot when none matches. That search is capped at miss_attempts solver runs to
+keep the first click quick; past it the click gets a plain board with its safe zone, counted in fallbacks.
+A miss on a full queue drops its oldest board, so the queue keeps turning over instead of filling up with
+boards that do not suit the clicks being made.
+"""
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import game_logic as gl
+from solver import Solver
+
+
+class Board:
+    def __init__(self, mine_mask: np.ndarray, neighbor_counts: np.ndarray, first_clicks: np.ndarray = None) -> None:
+        self.mine_mask = mine_mask
+        self.neighbor_counts = neighbor_counts
+        # No-guess boards only: cells the board is solvable from as a first click
+        self.first_clicks = first_clicks
+
+
+def _uniform_board(size: tuple, num_of_mines: int, rng: np.random.Generator) -> Board:
+    mine_mask = np.zeros(size, dtype=bool)
+    mine_mask.reshape(-1)[rng.choice(mine_mask.size, num_of_mines, replace=False)] = True
+    return Board(mine_mask, gl.count_neighbors(mine_mask))
+
+
+def _opening(board: Board, click: tuple) -> np.ndarray:
+    # Zero cells revealed by opening click, i.e. the clicks that lead to the very same position
+    game = _game(board)
+    game.do_action(click, 'o')
+    return game.state == 0
+
+
+def _game(board: Board) -> gl.Game:
+    return gl.Game.from_board(board.mine_mask.copy(), board.neighbor_counts.copy(), verbose=False)
+
+
+def _first_clicks(board: Board, start: tuple) -> np.ndarray:
+    # Union of the openings the board is won from without guessing, starting from the known one at start
+    first_clicks = _opening(board, start)
+    untried = (board.neighbor_counts == 0) & ~board.mine_mask & ~first_clicks
+    while untried.any():
+        click = divmod(int(np.flatnonzero(untried)[0]), untried.shape[1])
+        opening = _opening(board, click)
+        if is_no_guess(board, click):
+            first_clicks |= opening
+        untried &= ~opening
+    return first_clicks
+
+
+def is_no_guess(board: Board, click: tuple) -> bool:
+    """Whether board can be won from the first click without guessing."""
+    game = _game(board)
+    game.do_action(click, 'o')
+    if game.end_game:
+        return game.game_won
+    return Solver(game).play_logically()
+
+
+def generate_board(size: tuple, num_of_mines: int, no_guess: bool = False, seed=None, click: tuple = None,
+                   max_attempts: int = 10000, safe_radius: int = gl.SAFE_RADIUS) -> Board:
+    """
+    One pool board. A no-guess board is tried from a random zero cell, or from click when given,
+    and None is returned if no board passes within max_attempts. Boards for a given click are drawn with
+    its safe zone clear, so every attempt is a solver run, and only boards tried from a random cell search
+    their other openings, which keeps a board generated for a given click quick.
+    """
+    rng = np.random.default_rng(seed)
+    for _ in range(max_attempts if no_guess else 1):
+        if click is not None and no_guess:
+            mine_mask = gl.generate_mine_mask(size, num_of_mines, click, safe_radius, rng)
+            board = Board(mine_mask, gl.count_neighbors(mine_mask))
+        else:
+            board = _uniform_board(size, num_of_mines, rng)
+        if not no_guess:
+            return board
+        zeros = np.flatnonzero((board.neighbor_counts == 0) & ~board.mine_mask)
+        if click is not None:
+            if board.neighbor_counts[click] != 0:
+                continue
+            start = tuple(click)
+        elif zeros.size:
+            start = divmod(int(rng.choice(zeros)), size[1])
+        else:
+            continue
+        if is_no_guess(board, start):
+            board.first_clicks = _opening(board, start) if click is not None else _first_clicks(board, start)
+            return board
+    return None
+
+
+def _zone(mine_mask: np.ndarray, pos: tuple, safe_radius: int) -> np.ndarray:
+    x0, y0 = max(pos[0] - safe_radius, 0), max(pos[1] - safe_radius, 0)
+    return mine_mask[x0:pos[0] + safe_radius + 1, y0:pos[1] + safe_radius + 1]
+
+
+# Mirror images keep a board's deductions, so every queued no-guess board stands for four boards
+_MIRRORS = [(slice(None, None, step_x), slice(None, None, step_y)) for step_x in (1, -1) for step_y in (1, -1)]
+
+
+def _orientations(size: tuple) -> list:
+    # (transpose, mirror) pairs; a square board also keeps its deductions when transposed, which doubles them
+    transposes = (False, True) if size[0] == size[1] else (False,)
+    return [(transpose, mirror) for transpose in transposes for mirror in _MIRRORS]
+
+
+def _clear_zone(board: Board, pos: tuple, safe_radius: int, rng: np.random.Generator) -> None:
+    # Moves the mines of the safe zone around pos to random free cells outside it, updating the counts in place
+    rows, cols = board.mine_mask.shape
+    x0, x1 = max(pos[0] - safe_radius, 0), min(pos[0] + safe_radius + 1, rows)
+    y0, y1 = max(pos[1] - safe_radius, 0), min(pos[1] + safe_radius + 1, cols)
+    moved = np.argwhere(board.mine_mask[x0:x1, y0:y1]) + (x0, y0)
+    if not moved.size:
+        return
+
+    mine_mask = board.mine_mask.reshape(-1)
+    free = np.flatnonzero(~mine_mask)
+    free_x, free_y = np.divmod(free, cols)
+    free = free[(free_x < x0) | (free_x >= x1) | (free_y < y0) | (free_y >= y1)]
+    if free.size < len(moved):
+        raise ValueError(f"{mine_mask.sum()} mines do not fit on a {rows}x{cols} board outside the safe zone")
+    added = np.column_stack(np.divmod(rng.choice(free, len(moved), replace=False), cols))
+
+    board.mine_mask[moved[:, 0], moved[:, 1]] = False
+    board.mine_mask[added[:, 0], added[:, 1]] = True
+    counts = board.neighbor_counts.astype(np.int16)
+    for cells, delta in ((moved, -1), (added, 1)):
+        near_x = (cells[:, :1] + gl._NEIGHBOR_DX).reshape(-1)
+        near_y = (cells[:, 1:] + gl._NEIGHBOR_DY).reshape(-1)
+        inside = (near_x >= 0) & (near_x < rows) & (near_y >= 0) & (near_y < cols)
+        np.add.at(counts, (near_x[inside], near_y[inside]), delta)
+    board.neighbor_counts[...] = counts
+
+
+class BoardPool:
+    def __init__(self, capacity: int = 8, no_guess: bool = False, workers: int = 1, processes: bool = False,
+                 seed=None, max_attempts: int = 10000, miss_attempts: int = 3) -> None:
+        self.capacity = capacity
+        self.no_guess = no_guess
+        self.max_attempts = max_attempts
+        # Solver runs a no-guess miss may spend on the caller's thread before it settles for a plain board
+        self.miss_attempts = miss_attempts
+        self.queues = {}
+        self.hits = 0
+        self.misses = 0
+        # No-guess misses that found no board within miss_attempts and got a plain one
+        self.fallbacks = 0
+        self._seeds = np.random.SeedSequence(seed)
+        self._rng = np.random.default_rng(self._seeds.spawn(1)[0])
+        self._executor = ProcessPoolExecutor(workers) if processes else None
+        self._changed = threading.Condition()
+        self._closed = False
+        self._workers = [threading.Thread(target=self._fill, daemon=True, name=f'board-pool-{i}')
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def prefetch(self, size: tuple, num_of_mines: int) -> None:
+        """Starts keeping boards of this configuration ready."""
+        with self._changed:
+            self.queues.setdefault((tuple(size), num_of_mines), deque())
+            self._changed.notify_all()
+
+    def ready(self, size: tuple, num_of_mines: int) -> int:
+        with self._changed:
+            return len(self.queues.get((tuple(size), num_of_mines), ()))
+
+    def _next_job(self) -> tuple:
+        with self._changed:
+            while not self._closed:
+                for key, queue in self.queues.items():
+                    if len(queue) < self.capacity:
+                        return key, self._seeds.spawn(1)[0]
+                self._changed.wait()
+        return None
+
+    def _fill(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            (size, num_of_mines), seed = job
+            args = (size, num_of_mines, self.no_guess, seed, None, self.max_attempts)
+            if self._executor:
+                board = self._executor.submit(generate_board, *args).result()
+            else:
+                board = generate_board(*args)
+            if board is None:
+                continue
+            with self._changed:
+                queue = self.queues[(size, num_of_mines)]
+                if len(queue) < self.capacity:
+                    queue.append(board)
+                self._changed.notify_all()
+
+    def _pop_matching(self, queue: deque, pos: tuple, safe_radius: int) -> Board:
+        for board in queue:
+            for transpose, index in _orientations(board.mine_mask.shape):
+                first_clicks = (board.first_clicks.T if transpose else board.first_clicks)[index]
+                mine_mask = (board.mine_mask.T if transpose else board.mine_mask)[index]
+                if first_clicks[pos] and not _zone(mine_mask, pos, safe_radius).any():
+                    queue.remove(board)
+                    neighbor_counts = (board.neighbor_counts.T if transpose else board.neighbor_counts)[index]
+                    return Board(mine_mask.copy(), neighbor_counts.copy(), first_clicks.copy())
+        return None
+
+    def take(self, size: tuple, num_of_mines: int, first_click_pos: tuple,
+             safe_radius: int = gl.SAFE_RADIUS) -> tuple:
+        """
+        (mine_mask, neighbor_counts) of a board for this first click. Without a matching queued board,
+        a plain pool returns None so the caller generates as usual, and a no-guess pool tries miss_attempts
+        boards here, then falls back to a plain board and counts it in fallbacks.
+        """
+        key = (tuple(size), num_of_mines)
+        pos = tuple(first_click_pos)
+        with self._changed:
+            queue = self.queues.setdefault(key, deque())
+            if self.no_guess:
+                board = self._pop_matching(queue, pos, safe_radius)
+                if board is None and len(queue) >= self.capacity:
+                    queue.popleft()
+            else:
+                board = queue.popleft() if queue else None
+            seed = self._seeds.spawn(1)[0]
+            self._changed.notify_all()
+
+        if board is None:
+            self.misses += 1
+            if not self.no_guess:
+                return None
+            rng = np.random.default_rng(seed)
+            board = generate_board(key[0], num_of_mines, True, rng, pos, self.miss_attempts, safe_radius)
+            if board is None:
+                self.fallbacks += 1
+                mine_mask = gl.generate_mine_mask(key[0], num_of_mines, pos, safe_radius, rng)
+                board = Board(mine_mask, gl.count_neighbors(mine_mask))
+        else:
+            self.hits += 1
+            if not self.no_guess:
+                _clear_zone(board, pos, safe_radius, self._rng)
+        return board.mine_mask, board.neighbor_counts
+
+    def close(self) -> None:
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        for worker in self._workers:
+            worker.join()
+        if self._executor:
+            self._executor.shutdown()
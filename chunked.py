@@ -0,0 +1,202 @@
+import os
+import tempfile
+from collections import OrderedDict, deque
+
+import numpy as np
+
+import game_logic as gl
+
+CHUNK_SIZE = 64
+
+
+def _seed_word(value: int) -> int:
+    # SeedSequence takes non-negative words only, so chunk coordinates are zigzag-encoded
+    return 2 * value if value >= 0 else -2 * value - 1
+
+
+class Chunk:
+    def __init__(self, mine_mask: np.ndarray, neighbor_counts: np.ndarray, state: np.ndarray) -> None:
+        self.mine_mask = mine_mask
+        self.neighbor_counts = neighbor_counts
+        self.state = state
+
+
+class ChunkedGame:
+    """
+    Unbounded board split into square chunks. A chunk's mines depend only on the seed and the chunk
+    coordinates and are generated the first time the chunk is touched; neighbour counts along its
+    border come from the regenerated mines of the chunks around it. Loaded chunks live in an LRU
+    cache of max_chunks entries; evicted chunks that were played on spill their states to disk and
+    are read back when touched again. Memory therefore follows the explored area, not the board.
+    Chunks may be viewed before the first click; they are regenerated with the safe zone once it is known.
+    """
+
+    def __init__(self, density: float = 0.15, seed: int = 0, chunk_size: int = CHUNK_SIZE,
+                 max_chunks: int = 256, spill_dir: str = None, safe_radius: int = gl.SAFE_RADIUS,
+                 max_reveal: int = 1_000_000) -> None:
+        self.density = density
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.spill_dir = spill_dir
+        self.safe_radius = safe_radius
+        # Above the percolation density of zero cells one click could open an infinite area,
+        # so a single flood fill stops after max_reveal cells
+        self.max_reveal = max_reveal
+        self.end_game = False
+        self.first_click_pos = None
+        self.chunks = OrderedDict()
+        self.spilled = set()
+        self._revealed = 0
+        self._flags = 0
+        self._correct_flags = 0
+        self._changes = []
+
+    @property
+    def revealed_cells(self) -> int:
+        return self._revealed
+
+    @property
+    def flagged_cells(self) -> int:
+        return self._flags
+
+    @property
+    def correct_flags(self) -> int:
+        return self._correct_flags
+
+    @property
+    def loaded_chunks(self) -> int:
+        return len(self.chunks)
+
+    def _chunk_mines(self, cx: int, cy: int) -> np.ndarray:
+        rng = np.random.default_rng([self.seed, _seed_word(cx), _seed_word(cy)])
+        mine_mask = rng.random((self.chunk_size, self.chunk_size)) < self.density
+        if self.first_click_pos is not None:
+            x, y = self.first_click_pos
+            left, top = cx * self.chunk_size, cy * self.chunk_size
+            x0, x1 = max(x - self.safe_radius - left, 0), min(x + self.safe_radius + 1 - left, self.chunk_size)
+            y0, y1 = max(y - self.safe_radius - top, 0), min(y + self.safe_radius + 1 - top, self.chunk_size)
+            if x0 < x1 and y0 < y1:
+                mine_mask[x0:x1, y0:y1] = False
+        return mine_mask
+
+    def _spill_path(self, cx: int, cy: int) -> str:
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='minesweeper-chunks-')
+        return os.path.join(self.spill_dir, f'{cx}_{cy}.npy')
+
+    def _load_chunk(self, cx: int, cy: int) -> Chunk:
+        size = self.chunk_size
+        padded = np.zeros((size + 2, size + 2), dtype=bool)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                mines = self._chunk_mines(cx + dx, cy + dy)
+                # Only the ring of cells touching this chunk is needed from its neighbours
+                rows = slice(size - 1, size) if dx < 0 else slice(0, 1) if dx > 0 else slice(0, size)
+                cols = slice(size - 1, size) if dy < 0 else slice(0, 1) if dy > 0 else slice(0, size)
+                x0 = 0 if dx < 0 else size + 1 if dx > 0 else 1
+                y0 = 0 if dy < 0 else size + 1 if dy > 0 else 1
+                part = mines[rows, cols]
+                padded[x0:x0 + part.shape[0], y0:y0 + part.shape[1]] = part
+        mine_mask = padded[1:-1, 1:-1].copy()
+        neighbor_counts = gl.count_neighbors(padded)[1:-1, 1:-1].copy()
+
+        if (cx, cy) in self.spilled:
+            state = np.load(self._spill_path(cx, cy))
+            self.spilled.discard((cx, cy))
+        else:
+            state = np.full((size, size), gl.UNEXPLORED_CODE, dtype=np.uint8)
+        return Chunk(mine_mask, neighbor_counts, state)
+
+    def chunk(self, cx: int, cy: int) -> Chunk:
+        """Chunk (cx, cy), loading it and evicting the least recently used one when the cache is full."""
+        key = (cx, cy)
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+        chunk = self._load_chunk(cx, cy)
+        self.chunks[key] = chunk
+        while len(self.chunks) > self.max_chunks:
+            (old_cx, old_cy), old = self.chunks.popitem(last=False)
+            if (old.state != gl.UNEXPLORED_CODE).any():
+                np.save(self._spill_path(old_cx, old_cy), old.state)
+                self.spilled.add((old_cx, old_cy))
+        return chunk
+
+    def _locate(self, pos: tuple) -> tuple:
+        cx, x = divmod(pos[0], self.chunk_size)
+        cy, y = divmod(pos[1], self.chunk_size)
+        return self.chunk(cx, cy), x, y
+
+    def state_at(self, pos: tuple) -> int:
+        chunk, x, y = self._locate(pos)
+        return int(chunk.state[x, y])
+
+    def cell_name(self, pos: tuple) -> str:
+        return str(gl.CELL_NAMES[self.state_at(pos)])
+
+    def window(self, x: int, y: int, rows: int, cols: int) -> np.ndarray:
+        """Cell-state codes of the rows x cols area starting at (x, y), e.g. for a viewport."""
+        view = np.empty((rows, cols), dtype=np.uint8)
+        size = self.chunk_size
+        for cx in range(x // size, (x + rows - 1) // size + 1):
+            for cy in range(y // size, (y + cols - 1) // size + 1):
+                chunk = self.chunk(cx, cy)
+                x0, x1 = max(x, cx * size), min(x + rows, (cx + 1) * size)
+                y0, y1 = max(y, cy * size), min(y + cols, (cy + 1) * size)
+                view[x0 - x:x1 - x, y0 - y:y1 - y] = chunk.state[x0 - cx * size:x1 - cx * size,
+                                                                 y0 - cy * size:y1 - cy * size]
+        return view
+
+    def pop_changes(self) -> np.ndarray:
+        """Global (x, y) positions of the cells changed since the previous call, shaped (n, 2)."""
+        changes = np.array(self._changes, dtype=np.int64).reshape(-1, 2)
+        self._changes = []
+        return changes
+
+    def expand_empty_cells(self, pos: tuple) -> int:
+        """Breadth-first reveal around a zero cell across chunk borders; returns the number of cells opened."""
+        chunk, x, y = self._locate(pos)
+        if chunk.neighbor_counts[x, y] != 0:
+            return 0
+        opened = 0
+        queue = deque([pos])
+        while queue and opened < self.max_reveal:
+            px, py = queue.popleft()
+            for i in (px - 1, px, px + 1):
+                for j in (py - 1, py, py + 1):
+                    chunk, x, y = self._locate((i, j))
+                    if chunk.state[x, y] != gl.UNEXPLORED_CODE:
+                        continue
+                    chunk.state[x, y] = chunk.neighbor_counts[x, y]
+                    self._changes.append((i, j))
+                    opened += 1
+                    if chunk.neighbor_counts[x, y] == 0:
+                        queue.append((i, j))
+        return opened
+
+    def do_action(self, cell_choice_pos: tuple, action: str) -> None:
+        if self.first_click_pos is None:
+            # Chunks loaded before the first click, e.g. by window, were drawn without the safe zone.
+            # Nothing could be played on them yet, so they are dropped and regenerated with it
+            self.first_click_pos = tuple(cell_choice_pos)
+            self.chunks.clear()
+
+        chunk, x, y = self._locate(cell_choice_pos)
+        if action == 'o':
+            if chunk.mine_mask[x, y]:
+                self.end_game = True
+            elif chunk.state[x, y] == gl.UNEXPLORED_CODE:
+                chunk.state[x, y] = chunk.neighbor_counts[x, y]
+                self._changes.append(tuple(cell_choice_pos))
+                self._revealed += 1 + self.expand_empty_cells(cell_choice_pos)
+        elif action == 'f' and chunk.state[x, y] == gl.UNEXPLORED_CODE:
+            chunk.state[x, y] = gl.FLAG_CODE
+            self._flags += 1
+            self._correct_flags += int(chunk.mine_mask[x, y])
+            self._changes.append(tuple(cell_choice_pos))
+        elif action == 'r' and chunk.state[x, y] == gl.FLAG_CODE:
+            chunk.state[x, y] = gl.UNEXPLORED_CODE
+            self._flags -= 1
+            self._correct_flags -= int(chunk.mine_mask[x, y])
+            self._changes.append(tuple(cell_choice_pos))
@@ -1,142 +1,557 @@
-import random
 import numpy as np
 
+from journal import (AFTER_MASK, END_AFTER, END_BEFORE, FLAGGED_AFTER, FLAGGED_BEFORE, SHOWN_AFTER,
+                     UNEXPLORED_AFTER, WON_AFTER, WON_BEFORE, Journal)
+
 UNEXPLORED = 'default'
 FLAG = 'flag'
 EMPTY = 'E'
 MINE = 'M'
 
+# Cell-state codes of Game.state: 0-8 are revealed numbers, the rest are covered or shown mines
+UNEXPLORED_CODE = 9
+FLAG_CODE = 10
+MINE_CODE = 11
+
+# Image name of every cell-state code, indexed by the code itself; a shown mine uses the 'mine' tile
+CELL_NAMES = np.array([str(i) for i in range(9)] + [UNEXPLORED, FLAG, 'mine'])
+
+# Action codes of Game.do_actions, with the do_action letters they stand for
+OPEN_ACTION = 0
+FLAG_ACTION = 1
+UNFLAG_ACTION = 2
+ACTION_CODES = {'o': OPEN_ACTION, 'f': FLAG_ACTION, 'r': UNFLAG_ACTION}
+
+# Cells around the first click, in each direction, that never hold a mine
+SAFE_RADIUS = 1
+
+# Shared, never written transition codes of the journal records where every cell changed the same way
+_OPENED = np.array([SHOWN_AFTER], dtype=np.uint8)
+_FLAGGED = np.array([FLAGGED_AFTER], dtype=np.uint8)
+_UNFLAGGED = np.array([FLAGGED_BEFORE | UNEXPLORED_AFTER], dtype=np.uint8)
+_NO_CODES = np.empty(0, dtype=np.uint8)
+
+_NEIGHBOR_DX = np.array([-1, -1, -1, 0, 0, 1, 1, 1])
+_NEIGHBOR_DY = np.array([-1, 0, 1, -1, 1, -1, 0, 1])
+
+
+def count_neighbors(mine_mask: np.ndarray) -> np.ndarray:
+    """
+    Number of mines in the eight neighbours of every cell of a boolean mine mask.
+    Sums shifted views of a zero-padded copy, so no Python loop runs per cell.
+    """
+    rows, cols = mine_mask.shape
+    padded = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = mine_mask
+    counts = np.zeros((rows, cols), dtype=np.uint8)
+    for dx in range(3):
+        for dy in range(3):
+            if dx == 1 and dy == 1:
+                continue
+            counts += padded[dx:dx + rows, dy:dy + cols]
+    return counts
+
+
+def generate_mine_mask(size: tuple, num_of_mines: int, first_click_pos: tuple = (0, 0),
+                       safe_radius: int = SAFE_RADIUS, rng=None) -> np.ndarray:
+    """
+    Boolean mine mask with num_of_mines mines outside the square of safe_radius around the first click.
+    rng is a seed or a numpy Generator; mines come from one draw without replacement, so the cost
+    follows the number of mines rather than the board area.
+    """
+    rng = np.random.default_rng(rng)
+    rows, cols = size
+    x, y = first_click_pos
+    safe_x = np.arange(max(x - safe_radius, 0), min(x + safe_radius + 1, rows))
+    safe_y = np.arange(max(y - safe_radius, 0), min(y + safe_radius + 1, cols))
+    safe_cells = (safe_x[:, None] * cols + safe_y).reshape(-1)
+
+    available = rows * cols - safe_cells.size
+    if num_of_mines > available:
+        raise ValueError(f"{num_of_mines} mines do not fit on a {rows}x{cols} board outside the safe zone")
+
+    # Draw among the available cells only, then step every draw over the safe cells in front of it
+    cells = rng.choice(available, num_of_mines, replace=False)
+    for safe_cell in safe_cells:
+        cells[cells >= safe_cell] += 1
+
+    mine_mask = np.zeros(size, dtype=bool)
+    mine_mask.reshape(-1)[cells] = True
+    return mine_mask
+
+
+def generate_mine_masks(size: tuple, num_of_mines: int, count: int, first_click_pos: tuple = (0, 0),
+                        safe_radius: int = SAFE_RADIUS, rng=None) -> np.ndarray:
+    """Stack of count independent mine masks, shaped (count, rows, cols), drawn from one generator."""
+    rng = np.random.default_rng(rng)
+    mine_masks = np.empty((count, size[0], size[1]), dtype=bool)
+    for i in range(count):
+        mine_masks[i] = generate_mine_mask(size, num_of_mines, first_click_pos, safe_radius, rng)
+    return mine_masks
+
+
+def _byte_table(strings: list) -> np.ndarray:
+    # (len(strings), width) uint8 table of the encoded strings, NUL-padded to the longest one
+    encoded = [string.encode() for string in strings]
+    width = max((len(data) for data in encoded), default=0)
+    return np.array([list(data.ljust(width, b'\0')) for data in encoded], dtype=np.uint8).reshape(len(encoded), width)
+
+
+def _nums_view(counts: np.ndarray, mine_mask: np.ndarray) -> np.ndarray:
+    # '<U1' keeps the old layout, where mine cells end up as 'm'
+    neighbors_list = counts.astype('<U1')
+    neighbors_list[mine_mask] = 'mine'
+    return neighbors_list
+
+
+def _positions(mask: np.ndarray) -> list:
+    return [tuple(pos) for pos in np.argwhere(mask).tolist()]
+
 
 class Game:
-    def __init__(self, size: tuple, num_of_mines: int):
+    def __init__(self, size: tuple, num_of_mines: int, seed=None, safe_radius: int = SAFE_RADIUS,
+                 verbose: bool = True, state: np.ndarray = None, pool=None, backend=None):
         self.size = size
         self.num_of_mines = num_of_mines
-        self.game_board = None
-        self.nums_board = None
-        self.player_board = np.full(self.size, UNEXPLORED)
+        # seed is an int for reproducible boards, a numpy Generator, or None for a fresh one
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.safe_radius = safe_radius
+        # Headless drivers turn this off to keep win/loss messages and the final board out of stdout
+        self.verbose = verbose
+        # Optional board_pool.BoardPool that setup takes a pre-generated board from. Its boards come from
+        # the pool's own seed, so seed only applies to the boards setup still generates itself
+        self.pool = pool
+        # Optional parallel.TiledBackend that holds the board arrays in shared memory and runs whole-board work
+        self.backend = backend
+        # Compact board: one uint8 code per cell plus the boolean mine mask and uint8 neighbour counts
+        self.mine_mask = None
+        self.neighbor_counts = None
+        # A restored game passes its own state array, possibly memory-mapped, instead of a fresh one
+        if state is None:
+            state = np.full(self.size, UNEXPLORED_CODE, dtype=np.uint8)
+        self.state = backend.share(state) if backend is not None else state
         self.end_game = False
         self.game_won = False
         self.first_click = True
-        self.mine_poses = []
-        self.flag_poses = []
-        self.unexplored_poses = [(x, y) for x in range(self.size[0]) for y in range(self.size[1])]
+        # Running counters, kept in step with state so progress checks never rescan the board
+        self._safe_cells = self.state.size - num_of_mines
+        self._revealed = 0
+        self._flags = 0
+        self._correct_flags = 0
+        # Every action with the cells it changed, for undo/redo, changes_since and pop_changes
+        self.journal = Journal()
+        # Journal version at the last pop_changes call
+        self._popped_version = 0
+
+    @classmethod
+    def from_board(cls, mine_mask: np.ndarray, neighbor_counts: np.ndarray = None, **kwargs) -> 'Game':
+        """Game on a prepared board, already past setup, so its first action plays on that board."""
+        game = cls(mine_mask.shape, int(np.count_nonzero(mine_mask)), **kwargs)
+        if neighbor_counts is None:
+            neighbor_counts = count_neighbors(mine_mask)
+        if game.backend is not None:
+            mine_mask, neighbor_counts = game.backend.share(mine_mask), game.backend.share(neighbor_counts)
+        game.mine_mask = mine_mask
+        game.neighbor_counts = neighbor_counts
+        game._safe_cells = game.state.size - game.num_of_mines
+        game.first_click = False
+        return game
+
+    # Compatibility views of the compact board, built on demand
+
+    @property
+    def game_board(self) -> np.ndarray:
+        if self.mine_mask is None:
+            return None
+        return np.where(self.mine_mask, MINE, EMPTY)
+
+    @property
+    def nums_board(self) -> np.ndarray:
+        if self.mine_mask is None:
+            return None
+        return _nums_view(self.neighbor_counts, self.mine_mask)
+
+    @property
+    def player_board(self) -> np.ndarray:
+        return CELL_NAMES[self.state]
+
+    @property
+    def flag_mask(self) -> np.ndarray:
+        return self.state == FLAG_CODE
+
+    @property
+    def mine_poses(self) -> list:
+        if self.mine_mask is None:
+            return []
+        return _positions(self.mine_mask)
+
+    @property
+    def flag_poses(self) -> list:
+        return _positions(self.flag_mask)
+
+    @property
+    def unexplored_poses(self) -> list:
+        return _positions(self.state >= UNEXPLORED_CODE)
+
+    @property
+    def revealed_cells(self) -> int:
+        return self._revealed
+
+    @property
+    def flagged_cells(self) -> int:
+        return self._flags
+
+    @property
+    def correct_flags(self) -> int:
+        return self._correct_flags
+
+    @property
+    def unexplored_safe_cells(self) -> int:
+        return self._safe_cells - self._revealed
+
+    @property
+    def remaining_mines(self) -> int:
+        return self.num_of_mines - self._flags
+
+    def pop_changes(self) -> np.ndarray:
+        """Flat indexes (x * size[1] + y) of the cells whose state changed since the previous call."""
+        changes = self.journal.changed_cells(self._popped_version)
+        self._popped_version = self.journal.version
+        return changes
+
+    @property
+    def version(self) -> int:
+        return self.journal.version
+
+    def changes_since(self, version: int) -> tuple:
+        """(cells, states): flat indexes of the cells that may differ from the board at version and their states now."""
+        cells = self.journal.changed_cells(version)
+        return cells, self.state.reshape(-1)[cells]
+
+    def _end_flags(self, after: bool) -> int:
+        if after:
+            return END_AFTER * self.end_game | WON_AFTER * self.game_won
+        return END_BEFORE * self.end_game | WON_BEFORE * self.game_won
+
+    def _record(self, positions, actions, cells: np.ndarray, end_before: int, before: np.ndarray = None,
+                codes: np.ndarray = None) -> None:
+        # Either the cells' states before the action, or their journal transition codes
+        end_flags = end_before | self._end_flags(after=True)
+        # The first record is kept even when nothing changed: it is the click that set the board up,
+        # which load_journal needs to set it up the same way
+        if cells.size or (end_flags >> 2) != end_flags & 3 or not len(self.journal):
+            if codes is None:
+                after = self.state.reshape(-1)[cells]
+                codes = np.select([after == UNEXPLORED_CODE, after == FLAG_CODE], [UNEXPLORED_AFTER, FLAGGED_AFTER],
+                                  SHOWN_AFTER).astype(np.uint8)
+                codes[before == FLAG_CODE] |= FLAGGED_BEFORE
+            self.journal.append(positions, actions, cells, codes, end_flags)
+
+    def _states(self, cells: np.ndarray, codes: np.ndarray) -> tuple:
+        # Before and after states of a journal record, rebuilt from its codes and the board
+        shown = self.neighbor_counts.reshape(-1)[cells]
+        shown[self.mine_mask.reshape(-1)[cells]] = MINE_CODE
+        if codes.size == 1:
+            code = int(codes[0])
+            before = np.full(cells.size, FLAG_CODE if code & FLAGGED_BEFORE else UNEXPLORED_CODE, dtype=np.uint8)
+            if code & AFTER_MASK == SHOWN_AFTER:
+                return before, shown
+            return before, np.full(cells.size, FLAG_CODE if code & AFTER_MASK == FLAGGED_AFTER else UNEXPLORED_CODE,
+                                   dtype=np.uint8)
+        before = np.where(codes & FLAGGED_BEFORE, FLAG_CODE, UNEXPLORED_CODE).astype(np.uint8)
+        after = np.choose(codes & AFTER_MASK, (shown, UNEXPLORED_CODE, FLAG_CODE)).astype(np.uint8)
+        return before, after
+
+    def _count(self, cells: np.ndarray, states: np.ndarray) -> tuple:
+        flags = states == FLAG_CODE
+        return (int(np.count_nonzero(states < UNEXPLORED_CODE)), int(np.count_nonzero(flags)),
+                int(np.count_nonzero(flags & self.mine_mask.reshape(-1)[cells])))
+
+    def _step(self, record: int, forward: bool) -> None:
+        journal = self.journal
+        cells = journal.cells(record)
+        before, after = self._states(cells, journal.codes[record])
+        old, new = (before, after) if forward else (after, before)
+        self.state.reshape(-1)[cells] = new
+        (old_revealed, old_flags, old_correct), (new_revealed, new_flags, new_correct) = \
+            self._count(cells, old), self._count(cells, new)
+        self._revealed += new_revealed - old_revealed
+        self._flags += new_flags - old_flags
+        self._correct_flags += new_correct - old_correct
+        end_flags = journal.end_flags[record] >> 2 if forward else journal.end_flags[record] & 3
+        self.end_game, self.game_won = bool(end_flags & 1), bool(end_flags & 2)
+        journal.events.append(record)
+
+    def undo(self) -> bool:
+        """Takes back the latest action; returns False when there is nothing to undo."""
+        if not self.journal.applied:
+            return False
+        record = self.journal.applied.pop()
+        self._step(record, forward=False)
+        self.journal.undone.append(record)
+        return True
+
+    def redo(self) -> bool:
+        """Applies the latest undone action again; a new action drops the actions left to redo."""
+        if not self.journal.undone:
+            return False
+        record = self.journal.undone.pop()
+        self._step(record, forward=True)
+        self.journal.applied.append(record)
+        return True
+
+    def load_journal(self, journal: Journal) -> None:
+        """
+        Continues a game from its journal, e.g. one read back with Journal.from_bytes, on a fresh Game with
+        the same size, mines and seed. The first click sets the board up as it did originally, the applied
+        records are written onto it, and undo, redo and changes_since carry on from the journal's history.
+        """
+        if len(self.journal):
+            raise ValueError("a journal can only be loaded into a game that has no actions yet")
+        # The first record with positions is the click that set the board up, even if it was undone since
+        played = [record for record in range(len(journal)) if journal.actions[record].size]
+        if self.first_click and played:
+            self.setup(tuple(int(value) for value in journal.positions[played[0]][0]))
+            self.first_click = False
+        state = self.state.reshape(-1)
+        for record in journal.applied:
+            cells = journal.cells(record)
+            state[cells] = self._states(cells, journal.codes[record])[1]
+        flags = state == FLAG_CODE
+        self._revealed = int(np.count_nonzero(state < UNEXPLORED_CODE))
+        self._flags = int(np.count_nonzero(flags))
+        self._correct_flags = int(np.count_nonzero(flags & self.mine_mask.reshape(-1))) if played else 0
+        end_flags = journal.end_flags[journal.applied[-1]] >> 2 if journal.applied else 0
+        self.end_game, self.game_won = bool(end_flags & 1), bool(end_flags & 2)
+        self.journal = journal
+        # The next pop_changes reports every cell the journal touched
+        self._popped_version = 0
+
+    def cell_name(self, pos: tuple) -> str:
+        return str(CELL_NAMES[self.state[pos[0], pos[1]]])
 
     def setup(self, first_click_pos: tuple = (0, 0)) -> None:
-        self.game_board = self.generate_board(first_click_pos)
-        self.nums_board = self.generate_neighbors_board()
+        board = None
+        if self.pool is not None:
+            board = self.pool.take(self.size, self.num_of_mines, first_click_pos, self.safe_radius)
+        if board is None:
+            self.mine_mask = self.generate_board(first_click_pos)
+            self.neighbor_counts = self.generate_neighbors_board(raw=True)
+        else:
+            self.mine_mask, self.neighbor_counts = board
+            if self.backend is not None:
+                self.mine_mask = self.backend.share(self.mine_mask)
+                self.neighbor_counts = self.backend.share(self.neighbor_counts)
+        self._safe_cells = self.state.size - self.num_of_left_mines()
 
     def generate_board(self, first_click_pos: tuple) -> np.ndarray:
-        temp_board = np.full([self.size[0], self.size[1]], EMPTY)
-        available_pos_for_mines = [(x, y) for x in range(self.size[0]) for y in range(self.size[1])]
-        first_positions = [(x, y)
-                           for x in
-                           range(first_click_pos[0] - 2,
-                                 first_click_pos[0] + 2)
-                           for y in
-                           range(first_click_pos[1] - 2,
-                                 first_click_pos[1] + 2)]
-
-        available_pos_for_mines = [pos for pos in available_pos_for_mines if pos not in first_positions]
-        mines_to_be_placed = self.num_of_mines
-
-        while mines_to_be_placed > 0:
-            rand_pos = random.choice(available_pos_for_mines)
-            temp_board[rand_pos[0], rand_pos[1]] = MINE
-            mines_to_be_placed -= 1
-            self.mine_poses.append(rand_pos)
-            available_pos_for_mines.remove(rand_pos)
-        return temp_board
-
-    def generate_neighbors_board(self) -> np.ndarray:
-        neighbors_board_dict = {}
-
-        for x, row in enumerate(self.game_board):
-            for y, value in enumerate(row):
-                neighbors_board_dict[(x, y)] = neighbors_board_dict.get((x, y), 0)
-                if self.game_board[x, y] == MINE:
-                    neighbors_board_dict[(x, y)] = 'mine'
-                    continue
-                for i in [x - 1, x, x + 1]:
-                    for j in [y - 1, y, y + 1]:
-                        if i < 0 or i > (len(self.game_board) - 1) or j < 0 or j > (len(row) - 1):
-                            continue
-                        if self.game_board[i, j] == MINE:
-                            neighbors_board_dict[(x, y)] = neighbors_board_dict.get((x, y)) + 1
-
-        neighbors_list = np.full(self.game_board.shape, '0')
-        for key, value in neighbors_board_dict.items():
-            neighbors_list[key[0], key[1]] = str(value)
-        return neighbors_list
+        mine_mask = generate_mine_mask(self.size, self.num_of_mines, first_click_pos, self.safe_radius, self.rng)
+        return self.backend.share(mine_mask) if self.backend is not None else mine_mask
+
+    def generate_neighbors_board(self, raw: bool = False) -> np.ndarray:
+        if self.backend is not None:
+            counts = self.backend.count_neighbors(self.mine_mask)
+        else:
+            counts = count_neighbors(self.mine_mask)
+        if raw:
+            return counts
+        return _nums_view(counts, self.mine_mask)
 
     def print_board(self, board) -> None:
-        view = ""
-        view += f"   {str([i + 1 for i in range(len(board))])[1:-1].replace(',', '')}\n\n"
-        for x in range(len(board[0])):
-            view += f"{x + 1}  "
-            for y in range(len(board)):
-                view += str(board[y, x]) + " "
-            view += f"  {x + 1}\n"
-        view += f"\n   {str([i + 1 for i in range(len(board))])[1:-1].replace(',', '')}\n"
-        print(view)
-
-    def expand_empty_cells(self, pos: tuple) -> None:
-        (x, y) = pos
-        if self.nums_board[x, y] != '0':
-            return
-        for i in [x - 1, x, x + 1]:
-            for j in [y - 1, y, y + 1]:
-                if (i == x and j == y) or i < 0 or i > self.size[0] - 1 or j < 0 or j > self.size[1] - 1:
-                    continue
-                if self.player_board[i, j] == UNEXPLORED:
-                    self.player_board[i, j] = self.nums_board[i, j]
-                    self.unexplored_poses.remove((i, j))
-                    self.expand_empty_cells((i, j))
+        """
+        Prints board, indexed [column, row], with row and column numbers around it.
+        Cells go through a byte table of their names, so the board is one fancy index and one tobytes().
+        """
+        board = np.asarray(board)
+        if board.dtype.kind in 'ui':
+            names, codes = CELL_NAMES, board
+        else:
+            names, codes = np.unique(board, return_inverse=True)
+            codes = codes.reshape(board.shape)
+        columns, rows = board.shape
+        numbers = ' '.join(str(i + 1) for i in range(columns))
+        cells = _byte_table([f'{name} ' for name in names.tolist()])[codes.T].reshape(rows, -1)
+        lines = np.concatenate([_byte_table([f'{x + 1}  ' for x in range(rows)]), cells,
+                                _byte_table([f'  {x + 1}\n' for x in range(rows)])], axis=1)
+        # The tables are NUL-padded to a common width, and the padding is dropped here
+        view = lines[lines != 0].tobytes().decode()
+        print(f"   {numbers}\n\n{view}\n   {numbers}\n")
+
+    def expand_empty_cells(self, pos: tuple) -> np.ndarray:
+        """
+        Opens every unexplored cell reachable from pos through zero cells.
+        Runs breadth-first over whole layers of flat indexes instead of recursing per cell,
+        and returns the flat indexes of the cells it revealed.
+        """
+        if self.neighbor_counts[pos[0], pos[1]] != 0:
+            return np.empty(0, dtype=np.intp)
+        return self._expand(np.array([pos[0]]), np.array([pos[1]]))
+
+    def _expand(self, layer_x: np.ndarray, layer_y: np.ndarray) -> np.ndarray:
+        # Breadth-first reveal from a first layer of already opened zero cells
+        rows, cols = self.size
+        if self.backend is not None:
+            return self.backend.expand(self.state, self.neighbor_counts, layer_x * cols + layer_y)
+        state = self.state.reshape(-1)
+        counts = self.neighbor_counts.reshape(-1)
+        revealed = [np.empty(0, dtype=np.intp)]
+        while layer_x.size:
+            near_x = (layer_x[:, None] + _NEIGHBOR_DX).reshape(-1)
+            near_y = (layer_y[:, None] + _NEIGHBOR_DY).reshape(-1)
+            inside = (near_x >= 0) & (near_x < rows) & (near_y >= 0) & (near_y < cols)
+            cells = near_x[inside] * cols + near_y[inside]
+            cells = np.sort(cells[state[cells] == UNEXPLORED_CODE])
+            first = np.ones(cells.size, dtype=bool)
+            first[1:] = cells[1:] != cells[:-1]
+            cells = cells[first]
+            state[cells] = counts[cells]
+            revealed.append(cells)
+            layer_x, layer_y = np.divmod(cells[counts[cells] == 0], cols)
+        return np.concatenate(revealed)
 
     def num_of_left_mines(self) -> int:
-        return np.count_nonzero(self.game_board == MINE)
+        if self.mine_mask is None:
+            return 0
+        return np.count_nonzero(self.mine_mask)
 
     def reveal_player_board(self) -> None:
-        for x, row in enumerate(self.game_board):
-            for y, cell in enumerate(row):
-                if cell == MINE:
-                    self.player_board[x, y] = MINE
-                    continue
-                self.player_board[x, y] = self.nums_board[x, y]
-        self.print_board(self.player_board)
+        end_before = self._end_flags(after=False)
+        if self.backend is not None:
+            cells, before = self.backend.reveal(self.state, self.mine_mask, self.neighbor_counts)
+        else:
+            board = np.where(self.mine_mask, MINE_CODE, self.neighbor_counts).astype(np.uint8).reshape(-1)
+            cells = np.flatnonzero(self.state.reshape(-1) != board)
+            before = self.state.reshape(-1)[cells]
+            self.state.reshape(-1)[cells] = board[cells]
+        # Every safe cell is shown now, but the game is already over, so the win check stays quiet
+        self._revealed = self._safe_cells
+        self._flags = 0
+        self._correct_flags = 0
+        self._record(np.empty((0, 2)), np.empty(0), cells, end_before, before)
+        if self.verbose:
+            self.print_board(self.state)
+
+    def _check_win(self) -> None:
+        # A game that already ended, e.g. after the loss reveal, cannot be won any more
+        if not self.end_game and self._revealed == self._safe_cells:
+            if self.verbose:
+                print("You won!!!\n")
+            self.end_game = True
+            self.game_won = True
 
     def do_action(self, cell_choice_pos: tuple, action: str) -> None:
         if self.first_click:
             self.setup(cell_choice_pos)
             self.first_click = False
 
+        x, y = cell_choice_pos
+        cell = np.array([x * self.size[1] + y])
+        end_before = self._end_flags(after=False)
+        # Opening only ever turns unexplored cells into numbers
+        changed, codes = None, _OPENED
         if action == 'o':
-            if self.game_board[cell_choice_pos[0], cell_choice_pos[1]] == MINE:
-                print("You lost!")
+            if self.mine_mask[x, y]:
+                if self.verbose:
+                    print("You lost!")
                 self.end_game = True
-            elif self.player_board[cell_choice_pos[0], cell_choice_pos[1]] == UNEXPLORED:
-                num_of_near_mines = self.nums_board[cell_choice_pos[0], cell_choice_pos[1]]
-                self.player_board[cell_choice_pos[0], cell_choice_pos[1]] = num_of_near_mines
-                self.expand_empty_cells(cell_choice_pos)
-                self.unexplored_poses.remove(cell_choice_pos)
-        elif action == 'f':
-            self.player_board[cell_choice_pos[0], cell_choice_pos[1]] = FLAG
-            self.flag_poses.append(cell_choice_pos)
-        elif action == 'r' and self.player_board[cell_choice_pos[0], cell_choice_pos[1]] == FLAG:
-            self.player_board[cell_choice_pos[0], cell_choice_pos[1]] = UNEXPLORED
-            self.flag_poses.remove(cell_choice_pos)
-
-        can_win = True
-
-        for mine in self.mine_poses:
-            if mine not in self.unexplored_poses or len(self.mine_poses) != len(self.unexplored_poses):
-                can_win = False
-                break
-
-        if can_win:
-            print("You won!!!\n")
-            self.end_game = True
-            self.game_won = True
-            return
+            elif self.state[x, y] == UNEXPLORED_CODE:
+                self.state[x, y] = self.neighbor_counts[x, y]
+                revealed = self.expand_empty_cells(cell_choice_pos)
+                self._revealed += 1 + revealed.size
+                changed = np.concatenate((cell, revealed))
+        elif action == 'f' and self.state[x, y] == UNEXPLORED_CODE:
+            self.state[x, y] = FLAG_CODE
+            self._flags += 1
+            self._correct_flags += int(self.mine_mask[x, y])
+            changed, codes = cell, _FLAGGED
+        elif action == 'r' and self.state[x, y] == FLAG_CODE:
+            self.state[x, y] = UNEXPLORED_CODE
+            self._flags -= 1
+            self._correct_flags -= int(self.mine_mask[x, y])
+            changed, codes = cell, _UNFLAGGED
+        self._check_win()
+        if changed is not None or self._end_flags(after=False) != end_before or not len(self.journal):
+            if changed is None:
+                changed, codes = cell[:0], _NO_CODES
+            self._record(cell_choice_pos, ACTION_CODES.get(action, 255), changed, end_before, codes=codes)
+
+    def do_actions(self, positions, actions) -> tuple:
+        """
+        Applies a batch of actions and returns (cells, states): the sorted flat indexes of the cells
+        whose state the batch changed and their new state codes.
+        positions is an (n, 2) array of (x, y); actions holds ACTION_CODES values or the do_action letters.
+        Each run of equal consecutive actions is applied with whole-array updates, which gives the same
+        board as calling do_action in order. The win check runs at the end of the batch, and also right before
+        the first opened mine when there is one, since a lost game cannot be won any more.
+        """
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        actions = np.asarray(actions)
+        if actions.dtype.kind in 'US':
+            actions = np.array([ACTION_CODES[action] for action in actions.tolist()], dtype=np.uint8)
+        if not positions.size:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.uint8)
+        if self.first_click:
+            self.setup(tuple(positions[0]))
+            self.first_click = False
+
+        end_before = self._end_flags(after=False)
+        state = self.state.reshape(-1)
+        mines = self.mine_mask.reshape(-1)
+        counts = self.neighbor_counts.reshape(-1)
+        flat = positions[:, 0] * self.size[1] + positions[:, 1]
+        # Before-states of every written cell, so the diff can drop cells that ended where they began
+        touched, before = [], []
+
+        bounds = np.flatnonzero(np.diff(actions)) + 1
+        lost_at = -1
+        if not self.end_game:
+            # The first opened mine ends the game, so only the actions before it can still win it
+            hits = np.flatnonzero((actions == OPEN_ACTION) & mines[flat])
+            if hits.size and hits[0] > 0:
+                lost_at = hits[0]
+                bounds = np.union1d(bounds, hits[:1])
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, actions.size]):
+            if start == lost_at:
+                self._check_win()
+            action = actions[start]
+            cells = np.unique(flat[start:stop])
+            if action == OPEN_ACTION:
+                if mines[cells].any():
+                    if self.verbose and not self.end_game:
+                        print("You lost!")
+                    self.end_game = True
+                cells = cells[(state[cells] == UNEXPLORED_CODE) & ~mines[cells]]
+                touched.append(cells)
+                before.append(state[cells])
+                state[cells] = counts[cells]
+                zeros_x, zeros_y = np.divmod(cells[counts[cells] == 0], self.size[1])
+                revealed = self._expand(zeros_x, zeros_y)
+                touched.append(revealed)
+                before.append(np.full(revealed.size, UNEXPLORED_CODE, dtype=np.uint8))
+                self._revealed += cells.size + revealed.size
+            elif action == FLAG_ACTION or action == UNFLAG_ACTION:
+                old, new = (UNEXPLORED_CODE, FLAG_CODE) if action == FLAG_ACTION else (FLAG_CODE, UNEXPLORED_CODE)
+                cells = cells[state[cells] == old]
+                touched.append(cells)
+                before.append(state[cells])
+                state[cells] = new
+                sign = 1 if action == FLAG_ACTION else -1
+                self._flags += sign * cells.size
+                self._correct_flags += sign * int(np.count_nonzero(mines[cells]))
+
+        touched, before = np.concatenate(touched), np.concatenate(before)
+        order = np.argsort(touched, kind='stable')
+        touched, before = touched[order], before[order]
+        first = np.ones(touched.size, dtype=bool)
+        first[1:] = touched[1:] != touched[:-1]
+        cells, before = touched[first], before[first]
+        changed = state[cells] != before
+        cells, before = cells[changed], before[changed]
+
+        self._check_win()
+        self._record(positions, actions, cells, end_before, before)
+        return cells, state[cells]
 
 # game = Game((2, 2), 1)
 # game.setup()
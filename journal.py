@@ -0,0 +1,184 @@
+"""
+Append-only action journal of a Game.
+
+Every action that changed something becomes one record: the action's positions and codes, the
+changed cells as runs of consecutive flat indexes, and a transition code per cell that says whether
+the cell was flagged before and what it shows after. A record whose cells all changed the same way,
+such as a flood fill, keeps a single code. The states themselves follow from the code and the board,
+so a flood fill costs a few bytes per row it touches rather than several bytes per cell.
+
+Records are never removed. Game.undo and Game.redo move along them, and every apply, undo or redo
+appends the record it touched to the event list. Game.version is the length of that list, so
+changes_since(version) is the union of the cells of the later events, whichever way they went.
+to_bytes and from_bytes save and restore a journal, and Game.load_journal continues a restored one
+on a new game with the same seed.
+"""
+import struct
+
+import numpy as np
+
+MAGIC = b'MSJL'
+VERSION = 2
+
+# magic, version, records, events, applied, undone
+HEADER = struct.Struct('<4sHIIII')
+
+# Bits of a record's end flags: end_game and game_won before and after it
+END_BEFORE, WON_BEFORE, END_AFTER, WON_AFTER = 1, 2, 4, 8
+
+# Transition codes: the low two bits say what a cell shows after the record (its number or mine,
+# unexplored or a flag), and FLAGGED_BEFORE marks cells that were flagged rather than unexplored before
+SHOWN_AFTER, UNEXPLORED_AFTER, FLAGGED_AFTER = 0, 1, 2
+FLAGGED_BEFORE = 4
+AFTER_MASK = 3
+
+# Runs below this size are found by sorting, larger dense ones through a mask over their span
+_MASK_RUNS_FROM = 4096
+
+
+def _runs(cells: np.ndarray, codes: np.ndarray) -> tuple:
+    """(starts, lengths, codes) of distinct flat indexes, with the codes put in run order."""
+    if not cells.size:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint32), codes
+    low, high = int(cells.min()), int(cells.max())
+    if cells.size >= _MASK_RUNS_FROM and high - low < 16 * cells.size:
+        # Padded with a cell on each side, so every run has a rising and a falling edge
+        mask = np.zeros(high - low + 3, dtype=bool)
+        mask[cells - low + 1] = True
+        if codes.size > 1:
+            spread = np.zeros(mask.size, dtype=np.uint8)
+            spread[cells - low + 1] = codes
+            codes = spread[mask]
+        edges = np.flatnonzero(mask[1:] != mask[:-1])
+        starts, lengths = edges[::2] + low, edges[1::2] - edges[::2]
+    else:
+        order = np.argsort(cells, kind='stable')
+        cells = cells[order]
+        if codes.size > 1:
+            codes = codes[order]
+        breaks = np.flatnonzero(np.diff(cells) != 1) + 1
+        starts, lengths = cells[np.r_[0, breaks]], np.diff(np.r_[0, breaks, cells.size])
+    # Flat indexes are kept as uint32, which covers boards of up to 2**32 cells
+    return starts.astype(np.uint32), lengths.astype(np.uint32), codes
+
+
+def _expand(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    lengths = lengths.astype(np.intp)
+    shift = starts.astype(np.intp) - (np.cumsum(lengths) - lengths)
+    return np.repeat(shift, lengths) + np.arange(lengths.sum(), dtype=np.intp)
+
+
+class Journal:
+    def __init__(self) -> None:
+        self.positions = []
+        self.actions = []
+        self.starts = []
+        self.lengths = []
+        self.codes = []
+        self.end_flags = []
+        # Record ids on the current line of play, and the ones undone since that can still be redone
+        self.applied = []
+        self.undone = []
+        self.events = []
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def version(self) -> int:
+        return len(self.events)
+
+    def append(self, positions: np.ndarray, actions: np.ndarray, cells: np.ndarray, codes: np.ndarray,
+               end_flags: int) -> int:
+        """Records distinct changed cells with one transition code each, or one code for all of them."""
+        if codes.size > 1 and (codes == codes[0]).all():
+            codes = codes[:1]
+        starts, lengths, codes = _runs(cells, codes)
+        record = len(self.codes)
+        # Copies, so a caller reusing its arrays cannot rewrite the history
+        self.positions.append(np.array(positions, dtype=np.int32).reshape(-1, 2))
+        self.actions.append(np.array(actions, dtype=np.uint8).reshape(-1))
+        self.starts.append(starts)
+        self.lengths.append(lengths)
+        self.codes.append(codes)
+        self.end_flags.append(end_flags)
+        self.applied.append(record)
+        self.undone.clear()
+        self.events.append(record)
+        return record
+
+    def cells(self, record: int) -> np.ndarray:
+        """Sorted flat indexes of the cells a record changed."""
+        return _expand(self.starts[record], self.lengths[record])
+
+    def changed_cells(self, version: int = 0) -> np.ndarray:
+        """Sorted flat indexes of the cells touched by the events after version."""
+        events = self.events[version:]
+        if not events:
+            return np.empty(0, dtype=np.intp)
+        if len(set(events)) == 1:
+            return self.cells(events[0])
+        cells = np.sort(np.concatenate([self.cells(record) for record in set(events)]))
+        first = np.ones(cells.size, dtype=bool)
+        first[1:] = cells[1:] != cells[:-1]
+        return cells[first]
+
+    def to_bytes(self) -> bytes:
+        """Header followed by the length tables and the concatenated record arrays."""
+        def join(arrays: list, dtype, shape: tuple = (-1,)) -> bytes:
+            if not arrays:
+                return b''
+            return np.concatenate([np.asarray(array, dtype=dtype).reshape(shape) for array in arrays]).tobytes()
+
+        parts = [
+            HEADER.pack(MAGIC, VERSION, len(self), len(self.events), len(self.applied), len(self.undone)),
+            np.array([len(starts) for starts in self.starts], dtype=np.uint32).tobytes(),
+            np.array([len(codes) for codes in self.codes], dtype=np.uint32).tobytes(),
+            np.array([np.size(actions) for actions in self.actions], dtype=np.uint32).tobytes(),
+            np.array(self.end_flags, dtype=np.uint8).tobytes(),
+            np.array(self.events + self.applied + self.undone, dtype=np.uint32).tobytes(),
+            join(self.starts, np.uint32),
+            join(self.lengths, np.uint32),
+            join(self.codes, np.uint8),
+            join(self.positions, np.int32, (-1, 2)),
+            join(self.actions, np.uint8),
+        ]
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Journal':
+        magic, version, records, events, applied, undone = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('not a Minesweeper journal')
+        if version > VERSION:
+            raise ValueError(f'journal version {version} is newer than the supported {VERSION}')
+
+        offset = HEADER.size
+
+        def take(dtype, count: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        run_lengths = take(np.uint32, records).astype(np.int64)
+        code_lengths = take(np.uint32, records).astype(np.int64)
+        action_lengths = take(np.uint32, records).astype(np.int64)
+        journal = cls()
+        journal.end_flags = take(np.uint8, records).tolist()
+        stacks = take(np.uint32, events + applied + undone).tolist()
+        journal.events = stacks[:events]
+        journal.applied = stacks[events:events + applied]
+        journal.undone = stacks[events + applied:]
+
+        run_splits = np.cumsum(run_lengths)[:-1]
+        code_splits = np.cumsum(code_lengths)[:-1]
+        action_splits = np.cumsum(action_lengths)[:-1]
+        total_runs, total_actions = int(run_lengths.sum()), int(action_lengths.sum())
+        journal.starts = np.split(take(np.uint32, total_runs), run_splits) if records else []
+        journal.lengths = np.split(take(np.uint32, total_runs), run_splits) if records else []
+        journal.codes = np.split(take(np.uint8, int(code_lengths.sum())), code_splits) if records else []
+        positions = take(np.int32, 2 * total_actions).reshape(-1, 2)
+        journal.positions = np.split(positions, action_splits) if records else []
+        journal.actions = np.split(take(np.uint8, total_actions), action_splits) if records else []
+        return journal
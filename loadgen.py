@@ -0,0 +1,116 @@
+"""
+Load generator for server.py.
+
+Opens --clients concurrent connections; every client plays --games games one after another, opening
+random covered cells in batches of --batch until the game ends. Prints request latency percentiles,
+requests per second and finished sessions per second. With --spawn it starts a server in-process.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+import game_logic as gl
+from server import GameServer
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: dict,
+                   latencies: list) -> dict:
+    start = time.perf_counter()
+    writer.write(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    latencies.append(time.perf_counter() - start)
+    if not reply['ok']:
+        raise RuntimeError(reply['error'])
+    return reply
+
+
+async def _client(args: argparse.Namespace, index: int, latencies: list) -> int:
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix, limit=1 << 26)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port, limit=1 << 26)
+    rng = np.random.default_rng([args.seed, index])
+    rows, cols = args.size
+    played = 0
+    try:
+        for game_index in range(args.games):
+            reply = await _request(reader, writer, {'op': 'new', 'size': [rows, cols], 'mines': args.mines,
+                                                    'seed': int(rng.integers(2 ** 32))}, latencies)
+            session = reply['session']
+            covered = np.ones(rows * cols, dtype=bool)
+            while True:
+                cells = np.flatnonzero(covered)
+                cells = rng.choice(cells, min(args.batch, cells.size), replace=False)
+                actions = [[int(x), int(y), 'o'] for x, y in zip(*np.divmod(cells, cols))]
+                reply = await _request(reader, writer, {'op': 'act', 'session': session, 'actions': actions},
+                                       latencies)
+                covered[cells] = False
+                changed = np.array(reply['cells'], dtype=np.intp)
+                covered[changed[np.array(reply['states'], dtype=np.uint8) < gl.UNEXPLORED_CODE]] = False
+                if reply['end'] or not covered.any():
+                    break
+            await _request(reader, writer, {'op': 'close', 'session': session}, latencies)
+            played += 1
+    finally:
+        writer.close()
+    return played
+
+
+async def run(args: argparse.Namespace) -> dict:
+    server = None
+    if args.spawn:
+        server = GameServer()
+        await server.start(args.host, 0, args.unix)
+        if not args.unix:
+            args.port = server.addresses[0][1]
+
+    latencies = []
+    start = time.perf_counter()
+    played = await asyncio.gather(*(_client(args, index, latencies) for index in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    if server:
+        await server.close()
+
+    milliseconds = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99]) if milliseconds.size else (0.0, 0.0, 0.0)
+    return {
+        'clients': args.clients,
+        'sessions': sum(played),
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'sessions_per_s': sum(played) / elapsed,
+        'requests_per_s': len(latencies) / elapsed,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(milliseconds.max()) if milliseconds.size else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load generator for the Minesweeper game server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='connect to this Unix socket path instead of TCP')
+    parser.add_argument('--spawn', action='store_true', help='start a server in this process first')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--games', type=int, default=10, help='games played by every client')
+    parser.add_argument('--size', type=int, nargs=2, default=(30, 16))
+    parser.add_argument('--mines', type=int, default=99)
+    parser.add_argument('--batch', type=int, default=1, help='cells opened per request')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"{report['sessions']} sessions, {report['requests']} requests in {report['seconds']:.2f}s: "
+          f"{report['sessions_per_s']:.1f} sessions/s, {report['requests_per_s']:.0f} requests/s, latency "
+          f"p50 {report['p50_ms']:.2f} ms, p95 {report['p95_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, "
+          f"max {report['max_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
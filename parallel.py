@@ -0,0 +1,314 @@
+"""
+Multi-core backend for the whole-board work of huge games.
+
+Game(backend=TiledBackend(...)) keeps its state, mine mask and neighbour counts in
+multiprocessing.shared_memory segments, and the backend splits the board into tiles of
+tile_rows x tile_cols cells that worker processes read and write in place:
+
+- count_neighbors: every tile counts from its mines plus a one-cell halo of the tiles around it.
+- expand: every tile runs the breadth-first reveal of Game._expand inside its own cells and hands the
+  cells it would spill into other tiles back as its border. The border-merge pass routes them to their
+  tiles for the next round, until no tile has anything left to open.
+- reveal: every tile writes its final cells and marks the ones that changed.
+
+A tile only ever writes its own cells, so the rounds need no locks. Counts, reveal and the final board
+are identical to the serial path; expand returns the same revealed cells, grouped by round and tile
+instead of in breadth-first order. Boards under min_cells skip the workers and run the serial code.
+
+A game's segments stay allocated until backend.release(game.state, game.mine_mask,
+game.neighbor_counts) or backend.close(). Workers map segments only for the task at hand.
+
+Whether the tiles pay off depends on the cores there are to run them: on a single core they only add
+the pickling and mapping of every task. Running parallel.py compares both paths on the machine at hand.
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import game_logic as gl
+
+# Arrays of the segments created in this process, so tiles run here use them without mapping them again
+_owned = {}
+
+
+def _in_segments(function, specs: tuple, *args):
+    """
+    Runs function on the arrays of specs, each (segment name, shape, dtype string) of an array created by
+    TiledBackend.empty, followed by args. Segments are mapped for this one task and closed again, so a
+    worker never keeps a segment mapped after its owner released it.
+    """
+    segments, arrays = [], []
+    for name, shape, dtype in specs:
+        if name in _owned:
+            arrays.append(_owned[name])
+            continue
+        segment = shared_memory.SharedMemory(name=name)
+        segments.append(segment)
+        arrays.append(np.ndarray(shape, dtype=dtype, buffer=segment.buf))
+    try:
+        return function(*arrays, *args)
+    finally:
+        arrays.clear()
+        for segment in segments:
+            segment.close()
+
+
+def _count_tile(mine_mask: np.ndarray, counts: np.ndarray, bounds: tuple) -> None:
+    rows, cols = mine_mask.shape
+    x0, x1, y0, y1 = bounds
+    # The halo is the ring of neighbouring cells around the tile, cut at the board edges
+    hx0, hx1, hy0, hy1 = max(x0 - 1, 0), min(x1 + 1, rows), max(y0 - 1, 0), min(y1 + 1, cols)
+    block = gl.count_neighbors(mine_mask[hx0:hx1, hy0:hy1])
+    counts[x0:x1, y0:y1] = block[x0 - hx0:x1 - hx0, y0 - hy0:y1 - hy0]
+
+
+def _neighbors(cells: np.ndarray, rows: int, cols: int) -> tuple:
+    x, y = np.divmod(cells, cols)
+    near_x = (x[:, None] + gl._NEIGHBOR_DX).reshape(-1)
+    near_y = (y[:, None] + gl._NEIGHBOR_DY).reshape(-1)
+    inside = (near_x >= 0) & (near_x < rows) & (near_y >= 0) & (near_y < cols)
+    return near_x[inside], near_y[inside]
+
+
+def _expand_tile(state: np.ndarray, counts: np.ndarray, bounds: tuple, cells: np.ndarray) -> tuple:
+    """
+    Opens the unexplored cells of one tile and floods on from its zero cells.
+    Returns (revealed flat indexes, flat indexes of cells in other tiles next to revealed zeros).
+    """
+    rows, cols = state.shape
+    state = state.reshape(-1)
+    counts = counts.reshape(-1)
+    x0, x1, y0, y1 = bounds
+    revealed = []
+    border = []
+    while cells.size:
+        cells = np.sort(cells[state[cells] == gl.UNEXPLORED_CODE])
+        first = np.ones(cells.size, dtype=bool)
+        first[1:] = cells[1:] != cells[:-1]
+        cells = cells[first]
+        state[cells] = counts[cells]
+        revealed.append(cells)
+        x, y = np.divmod(cells[counts[cells] == 0], cols)
+        near_x = (x[:, None] + gl._NEIGHBOR_DX).reshape(-1)
+        near_y = (y[:, None] + gl._NEIGHBOR_DY).reshape(-1)
+        inside = (near_x >= x0) & (near_x < x1) & (near_y >= y0) & (near_y < y1)
+        # The tile lies on the board, so only the few cells outside it need the board bounds checked
+        outside = ~inside
+        out_x, out_y = near_x[outside], near_y[outside]
+        on_board = (out_x >= 0) & (out_x < rows) & (out_y >= 0) & (out_y < cols)
+        outside = out_x[on_board] * cols + out_y[on_board]
+        # Another tile may be opening these right now; a stale read only sends it a cell it skips
+        border.append(outside[state[outside] == gl.UNEXPLORED_CODE])
+        cells = near_x[inside] * cols + near_y[inside]
+    empty = np.empty(0, dtype=np.intp)
+    return (np.concatenate(revealed) if revealed else empty), (np.concatenate(border) if border else empty)
+
+
+def _reveal_tile(mine_mask: np.ndarray, counts: np.ndarray, state: np.ndarray, before: np.ndarray,
+                 changed: np.ndarray, bounds: tuple) -> None:
+    x0, x1, y0, y1 = bounds
+    tile = (slice(x0, x1), slice(y0, y1))
+    board = np.where(mine_mask[tile], gl.MINE_CODE, counts[tile]).astype(np.uint8)
+    before[tile] = state[tile]
+    changed[tile] = state[tile] != board
+    state[tile] = board
+
+
+class TiledBackend:
+    def __init__(self, workers: int = None, tile_rows: int = 1024, tile_cols: int = 1024,
+                 min_cells: int = 1 << 20) -> None:
+        """workers=0 runs the tiles one after another in this process, which is handy for checking results."""
+        self.tile_rows = tile_rows
+        self.tile_cols = tile_cols
+        self.min_cells = min_cells
+        # Spawned workers map only the segments they are given, never copies inherited from a fork
+        self.executor = (ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+                         if workers != 0 else None)
+        # Buffer address -> (segment, spec) of every array created by share or empty
+        self._segments = {}
+        # Released segments still mapped by a live array; closed on a later release or close
+        self._lingering = []
+        # Board-sized (before, changed) scratch arrays of reveal, kept for the next reveal of the same shape
+        self._scratch = None
+        self.rounds = 0
+
+    # Shared arrays
+
+    def empty(self, shape: tuple, dtype) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        self._segments[array.ctypes.data] = (segment, (segment.name, tuple(shape), dtype.str))
+        _owned[segment.name] = array
+        return array
+
+    def full(self, shape: tuple, fill_value, dtype) -> np.ndarray:
+        array = self.empty(shape, dtype)
+        array.fill(fill_value)
+        return array
+
+    def share(self, array: np.ndarray) -> np.ndarray:
+        """array itself when it already lives in one of this backend's segments, otherwise a shared copy."""
+        if array.ctypes.data in self._segments and array.flags.c_contiguous:
+            return array
+        shared = self.empty(array.shape, array.dtype)
+        shared[...] = array
+        return shared
+
+    def _spec(self, array: np.ndarray) -> tuple:
+        return self._segments[array.ctypes.data][1]
+
+    def release(self, *arrays: np.ndarray) -> None:
+        """Frees the segments of arrays; they must not be used afterwards."""
+        for array in arrays:
+            segment, _ = self._segments.pop(array.ctypes.data)
+            del _owned[segment.name]
+            segment.unlink()
+            self._lingering.append(segment)
+        del arrays
+        self._close_lingering()
+
+    def _close_lingering(self) -> None:
+        lingering, self._lingering = self._lingering, []
+        for segment in lingering:
+            try:
+                segment.close()
+            except BufferError:
+                self._lingering.append(segment)
+
+    def close(self) -> None:
+        if self.executor:
+            self.executor.shutdown()
+        self._scratch = None
+        self.release(*[_owned[spec[0]] for _, spec in list(self._segments.values())])
+
+    # Tiles
+
+    def _tiles(self, shape: tuple) -> list:
+        rows, cols = shape
+        return [(x, min(x + self.tile_rows, rows), y, min(y + self.tile_cols, cols))
+                for x in range(0, rows, self.tile_rows) for y in range(0, cols, self.tile_cols)]
+
+    def _tile_of(self, cells: np.ndarray, shape: tuple) -> np.ndarray:
+        x, y = np.divmod(cells, shape[1])
+        tile_columns = -(-shape[1] // self.tile_cols)
+        return (x // self.tile_rows) * tile_columns + y // self.tile_cols
+
+    def _run(self, function, jobs: list) -> list:
+        # Every job is (arrays, *args); the arrays travel to the workers as the specs of their segments
+        jobs = [(tuple(self._spec(array) for array in arrays),) + tuple(args) for arrays, *args in jobs]
+        if self.executor is None:
+            return [_in_segments(function, *job) for job in jobs]
+        return [future.result() for future in [self.executor.submit(_in_segments, function, *job) for job in jobs]]
+
+    def _serial(self, array: np.ndarray) -> bool:
+        return array.size < self.min_cells
+
+    # Board work
+
+    def count_neighbors(self, mine_mask: np.ndarray) -> np.ndarray:
+        """Same as game_logic.count_neighbors, into a shared array."""
+        if self._serial(mine_mask):
+            return self.share(gl.count_neighbors(mine_mask))
+        mine_mask = self.share(mine_mask)
+        counts = self.empty(mine_mask.shape, np.uint8)
+        self._run(_count_tile, [((mine_mask, counts), bounds) for bounds in self._tiles(mine_mask.shape)])
+        return counts
+
+    def expand(self, state: np.ndarray, counts: np.ndarray, zero_cells: np.ndarray) -> np.ndarray:
+        """
+        Reveal of Game._expand from the already opened zero cells zero_cells (flat indexes), in a shared state.
+        Returns the flat indexes of the revealed cells.
+        """
+        near_x, near_y = _neighbors(zero_cells, *state.shape)
+        pending = near_x * state.shape[1] + near_y
+        if self._serial(state):
+            # One tile over the whole board has no border, so this is the plain breadth-first reveal
+            return _expand_tile(state, counts, (0, state.shape[0], 0, state.shape[1]), pending)[0]
+        tiles = self._tiles(state.shape)
+        revealed = []
+        while pending.size:
+            # Border merge: group the cells to open by the tile that owns them
+            owners = self._tile_of(pending, state.shape)
+            order = np.argsort(owners, kind='stable')
+            pending, owners = pending[order], owners[order]
+            starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            groups = np.split(pending, starts[1:])
+            results = self._run(_expand_tile, [((state, counts), tiles[owners[start]], cells)
+                                               for start, cells in zip(starts, groups)])
+            self.rounds += 1
+            revealed += [cells for cells, _ in results]
+            pending = np.concatenate([border for _, border in results])
+        if not revealed:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(revealed)
+
+    def reveal(self, state: np.ndarray, mine_mask: np.ndarray, counts: np.ndarray) -> tuple:
+        """
+        Writes the final board into state, like Game.reveal_player_board.
+        Returns (flat indexes of the changed cells, their states before).
+        """
+        if self._serial(state):
+            board = np.where(mine_mask, gl.MINE_CODE, counts).astype(np.uint8).reshape(-1)
+            cells = np.flatnonzero(state.reshape(-1) != board)
+            before = state.reshape(-1)[cells]
+            state.reshape(-1)[cells] = board[cells]
+            return cells, before
+        if self._scratch is None or self._scratch[0].shape != state.shape:
+            if self._scratch is not None:
+                self.release(*self._scratch)
+            self._scratch = (self.empty(state.shape, np.uint8), self.empty(state.shape, bool))
+        before, changed = self._scratch
+        # Every tile writes all of its cells, so the scratch arrays need no clearing between reveals
+        self._run(_reveal_tile, [((mine_mask, counts, state, before, changed), bounds)
+                                 for bounds in self._tiles(state.shape)])
+        cells = np.flatnonzero(changed)
+        return cells, before.reshape(-1)[cells]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the tiled backend with the serial path')
+    parser.add_argument('--size', type=int, nargs=2, default=(4000, 4000))
+    parser.add_argument('--density', type=float, default=0.1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--tile', type=int, nargs=2, default=(1024, 1024))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    size = tuple(args.size)
+    mines = int(size[0] * size[1] * args.density)
+    click = (size[0] // 2, size[1] // 2)
+    backend = TiledBackend(args.workers, *args.tile)
+    try:
+        timings = {}
+        games = {}
+        for name, game_backend in (('serial', None), ('tiled', backend)):
+            game = gl.Game(size, mines, seed=args.seed, verbose=False, backend=game_backend)
+            start = time.perf_counter()
+            game.setup(click)
+            game.first_click = False
+            setup = time.perf_counter() - start
+            start = time.perf_counter()
+            game.do_action(click, 'o')
+            opened = time.perf_counter() - start
+            start = time.perf_counter()
+            game.reveal_player_board()
+            timings[name] = (setup, opened, time.perf_counter() - start)
+            games[name] = game
+        same = all(np.array_equal(getattr(games['serial'], name), getattr(games['tiled'], name))
+                   for name in ('mine_mask', 'neighbor_counts', 'state'))
+        for name, (setup, opened, revealed) in timings.items():
+            print(f'{name:<7} setup {setup * 1000:8.1f} ms  open {opened * 1000:8.1f} ms  '
+                  f'reveal {revealed * 1000:8.1f} ms')
+        print(f'{backend.rounds} merge rounds, identical: {same}')
+    finally:
+        backend.close()
+
+
+if __name__ == '__main__':
+    main()
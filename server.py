@@ -0,0 +1,194 @@
+"""
+Asyncio server hosting many independent Game sessions.
+
+The protocol is line-delimited JSON over TCP or a Unix socket. Every request is one object with an
+"op" and an optional "id" that is echoed in the reply:
+
+    {"op": "new", "size": [30, 16], "mines": 99, "seed": 1}  -> {"ok": true, "session": 1}
+    {"op": "act", "session": 1, "actions": [[15, 8, "o"], [0, 0, "f"]]}
+        -> {"ok": true, "cells": [...], "states": [...], "end": false, "won": false}
+    {"op": "info", "session": 1}  -> counters of the session
+    {"op": "close", "session": 1}
+
+"act" goes through Game.do_actions, so the reply carries the flat indexes and new state codes of the
+changed cells only. A connection handles its requests in order and does not read the next line before
+the previous reply is drained, so a slow client slows only itself. Sessions unused for idle_timeout
+seconds are evicted. On boards of at least offload_cells cells, the first batch, which generates the
+board, and every batch that opens cells run in a thread pool, so one huge board setup or flood fill does
+not stall the other sessions.
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import game_logic as gl
+
+# Longest request line accepted, in bytes
+LINE_LIMIT = 1 << 20
+
+
+class Session:
+    def __init__(self, game: gl.Game) -> None:
+        self.game = game
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class GameServer:
+    def __init__(self, max_sessions: int = 10000, idle_timeout: float = 300.0, offload_cells: int = 250_000,
+                 workers: int = None, max_cells: int = 10_000 * 10_000) -> None:
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.offload_cells = offload_cells
+        self.max_cells = max_cells
+        self.sessions = {}
+        self.executor = ThreadPoolExecutor(workers)
+        self._next_session = 1
+        self._server = None
+        self._evictor = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, path: str = None) -> None:
+        if path:
+            self._server = await asyncio.start_unix_server(self._serve, path, limit=LINE_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self._serve, host, port, limit=LINE_LIMIT)
+        self._evictor = asyncio.ensure_future(self._evict_idle())
+
+    @property
+    def addresses(self) -> list:
+        return [socket.getsockname() for socket in self._server.sockets]
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        self._evictor.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def _evict_idle(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 10.0))
+            deadline = time.monotonic() - self.idle_timeout
+            for key in [key for key, session in self.sessions.items()
+                        if session.last_used < deadline and not session.lock.locked()]:
+                del self.sessions[key]
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line went over LINE_LIMIT; the stream cannot be resynchronised
+                    writer.write(b'{"ok": false, "error": "request too long"}\n')
+                    break
+                if not line:
+                    break
+                reply = await self.handle_line(line)
+                writer.write(json.dumps(reply, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> dict:
+        request = None
+        try:
+            request = json.loads(line)
+            op = request['op']
+            handler = getattr(self, f'_op_{op}', None)
+            if handler is None:
+                raise ValueError(f'unknown op {op!r}')
+            reply = await handler(request)
+        except (KeyError, TypeError, ValueError) as error:
+            reply = {'ok': False, 'error': f'{type(error).__name__}: {error}'}
+        if isinstance(request, dict) and 'id' in request:
+            reply['id'] = request['id']
+        return reply
+
+    def _session(self, request: dict) -> Session:
+        session = self.sessions.get(request['session'])
+        if session is None:
+            raise KeyError(f"no session {request['session']}")
+        session.last_used = time.monotonic()
+        return session
+
+    async def _op_new(self, request: dict) -> dict:
+        if len(self.sessions) >= self.max_sessions:
+            return {'ok': False, 'error': 'server is full'}
+        rows, cols = (int(value) for value in request['size'])
+        mines = int(request['mines'])
+        if rows <= 0 or cols <= 0 or rows * cols > self.max_cells:
+            raise ValueError(f'board size {rows}x{cols} is out of range')
+        if not 0 <= mines <= rows * cols - (2 * gl.SAFE_RADIUS + 1) ** 2:
+            raise ValueError(f'{mines} mines do not fit on a {rows}x{cols} board')
+        key = self._next_session
+        self._next_session += 1
+        self.sessions[key] = Session(gl.Game((rows, cols), mines, seed=request.get('seed'), verbose=False))
+        return {'ok': True, 'session': key}
+
+    async def _op_act(self, request: dict) -> dict:
+        session = self._session(request)
+        game = session.game
+        actions = request['actions']
+        positions = [(int(x), int(y)) for x, y, _ in actions]
+        codes = [gl.ACTION_CODES[action] for _, _, action in actions]
+        for x, y in positions:
+            if not (0 <= x < game.size[0] and 0 <= y < game.size[1]):
+                raise ValueError(f'cell ({x}, {y}) is outside the board')
+
+        async with session.lock:
+            if game.end_game:
+                return {'ok': False, 'error': 'game is over'}
+            # The first batch sets the board up whatever its actions are, and later ones only flood fill on opening
+            if game.state.size >= self.offload_cells and (game.first_click or gl.OPEN_ACTION in codes):
+                loop = asyncio.get_running_loop()
+                cells, states = await loop.run_in_executor(self.executor, game.do_actions, positions, codes)
+            else:
+                cells, states = game.do_actions(positions, codes)
+        session.last_used = time.monotonic()
+        return {'ok': True, 'cells': cells.tolist(), 'states': states.tolist(),
+                'end': game.end_game, 'won': game.game_won}
+
+    async def _op_info(self, request: dict) -> dict:
+        game = self._session(request).game
+        return {'ok': True, 'size': list(game.size), 'mines': game.num_of_mines, 'revealed': game.revealed_cells,
+                'flags': game.flagged_cells, 'end': game.end_game, 'won': game.game_won}
+
+    async def _op_close(self, request: dict) -> dict:
+        self._session(request)
+        del self.sessions[request['session']]
+        return {'ok': True}
+
+
+async def _main(args: argparse.Namespace) -> None:
+    server = GameServer(args.max_sessions, args.idle_timeout, args.offload_cells, args.workers)
+    await server.start(args.host, args.port, args.unix)
+    print(f"serving on {args.unix or server.addresses}")
+    await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Minesweeper game server speaking line-delimited JSON')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--idle-timeout', type=float, default=300.0, help='seconds before an unused session is dropped')
+    parser.add_argument('--offload-cells', type=int, default=250_000,
+                        help='boards with at least this many cells are set up and opened in the thread pool')
+    parser.add_argument('--workers', type=int, default=None, help='threads of the flood-fill pool')
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
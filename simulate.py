@@ -0,0 +1,141 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+import game_logic as gl
+from solver import Solver
+
+# Result columns, one value per game; a run saved with --out keeps each in its own .npy file
+RESULT_COLUMNS = {
+    'won': np.bool_,
+    'clicks': np.int32,
+    'revealed': np.int32,
+    'seconds': np.float32,
+}
+
+
+def random_policy(game: gl.Game, rng: np.random.Generator):
+    """Opens uniformly random unexplored cells."""
+    def next_action() -> tuple:
+        if game.first_click:
+            return (int(rng.integers(game.size[0])), int(rng.integers(game.size[1]))), 'o'
+        cells = np.flatnonzero(game.state == gl.UNEXPLORED_CODE)
+        return divmod(int(rng.choice(cells)), game.size[1]), 'o'
+    return next_action
+
+
+def solver_policy(game: gl.Game, rng: np.random.Generator):
+    """Plays the constraint solver's moves, guessing only when nothing is certain."""
+    return Solver(game, rng=rng).next_action
+
+
+# Move policies by name; a policy is built per game from the game and a Generator
+# and returns a function giving the next (pos, action), or None when it has no move
+POLICIES = {
+    'random': random_policy,
+    'solver': solver_policy,
+}
+
+
+def play_game(size: tuple, num_of_mines: int, policy, seed_sequence: np.random.SeedSequence,
+              max_actions: int = None) -> tuple:
+    """Plays one game to the end and returns its (won, clicks, revealed, seconds) row."""
+    board_seed, policy_seed = seed_sequence.spawn(2)
+    game = gl.Game(size, num_of_mines, seed=np.random.default_rng(board_seed), verbose=False)
+    next_action = policy(game, np.random.default_rng(policy_seed))
+    if max_actions is None:
+        max_actions = 4 * game.state.size
+
+    clicks = 0
+    start = time.perf_counter()
+    while not game.end_game and clicks < max_actions:
+        move = next_action()
+        if move is None:
+            break
+        game.do_action(*move)
+        clicks += 1
+    return game.game_won, clicks, game.revealed_cells, time.perf_counter() - start
+
+
+def run_shard(args: tuple) -> tuple:
+    """Plays games first..last - 1 of a run; each game's seed depends only on the run seed and its index."""
+    size, num_of_mines, policy_name, seed, first, last = args
+    policy = POLICIES[policy_name]
+    columns = {name: np.empty(last - first, dtype=dtype) for name, dtype in RESULT_COLUMNS.items()}
+    for i in range(first, last):
+        row = play_game(size, num_of_mines, policy, np.random.SeedSequence(seed, spawn_key=(i,)))
+        for name, value in zip(RESULT_COLUMNS, row):
+            columns[name][i - first] = value
+    return first, columns
+
+
+def simulate(size: tuple, num_of_mines: int, games: int, policy: str = 'random', seed: int = 0,
+             workers: int = None, shard_size: int = 1000, out: str = None) -> dict:
+    """
+    Plays games headless across a process pool and returns the result columns in game order.
+    Results, apart from the timings, are the same for a given seed whatever the worker count.
+    With out, the columns are .npy files in that directory, and every shard is written and flushed
+    there as soon as it finishes instead of the whole run being held in memory.
+    """
+    workers = workers or os.cpu_count()
+    shards = [(tuple(size), num_of_mines, policy, seed, first, min(first + shard_size, games))
+              for first in range(0, games, shard_size)]
+    if out is None:
+        results = {name: np.empty(games, dtype=dtype) for name, dtype in RESULT_COLUMNS.items()}
+    else:
+        os.makedirs(out, exist_ok=True)
+        results = {name: np.lib.format.open_memmap(os.path.join(out, f'{name}.npy'), mode='w+', dtype=dtype,
+                                                   shape=(games,))
+                   for name, dtype in RESULT_COLUMNS.items()}
+
+    if workers == 1:
+        _collect(map(run_shard, shards), results)
+    else:
+        with Pool(workers) as pool:
+            _collect(pool.imap_unordered(run_shard, shards), results)
+    return results
+
+
+def _collect(shard_results, results: dict) -> None:
+    for first, columns in shard_results:
+        for name, column in columns.items():
+            results[name][first:first + column.size] = column
+            if isinstance(results[name], np.memmap):
+                results[name].flush()
+
+
+def load_results(path: str) -> dict:
+    """Every column of a run saved with --out, memory-mapped, by name."""
+    return {name[:-len('.npy')]: np.load(os.path.join(path, name), mmap_mode='r')
+            for name in sorted(os.listdir(path)) if name.endswith('.npy')}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Headless Monte Carlo runs of Minesweeper games')
+    parser.add_argument('--size', type=int, nargs=2, default=(30, 16))
+    parser.add_argument('--mines', type=int, default=99)
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-size', type=int, default=1000)
+    parser.add_argument('--out', default='simulation', help='directory of the .npy result columns')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for name, value in (('size', np.array(args.size)), ('mines', args.mines), ('seed', args.seed)):
+        np.save(os.path.join(args.out, f'{name}.npy'), value)
+    start = time.perf_counter()
+    results = simulate(args.size, args.mines, args.games, args.policy, args.seed, args.workers, args.shard_size,
+                       args.out)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed * 60:.0f} games/min), "
+          f"win rate {results['won'].mean():.4f}, saved to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Versioned binary snapshots of a Game.
+
+A snapshot is a fixed header (sizes, seed, flags and progress counters), a table of layers and the
+layer bytes. Two layouts are supported:
+
+* 'packed' keeps the mine, revealed and flag masks at one bit per cell, optionally zlib-compressed.
+  It is the smallest file, and loading it rebuilds the board in memory.
+* 'raw' keeps the mine mask, cell states and neighbour counts at one byte per cell, so load_game can
+  memory-map them. Resuming then reads only the header, and saving a game loaded with
+  mmap_mode='r+' back to the same file only flushes the pages that were touched.
+"""
+import os
+import struct
+import zlib
+
+import numpy as np
+
+import game_logic as gl
+
+MAGIC = b'MSWP'
+VERSION = 1
+
+# magic, version, layout, rows, cols, mines, seed (-1 if none or wider than 63 bits), safe radius,
+# first click, end game, game won, layer count, revealed, flags, correct flags
+HEADER = struct.Struct('<4sHHIIIqHBBBBQQQ')
+# name, encoding, offset, length
+LAYER = struct.Struct('<8sB7xQQ')
+
+LAYOUT_PACKED = 0
+LAYOUT_RAW = 1
+LAYOUTS = {'packed': LAYOUT_PACKED, 'raw': LAYOUT_RAW}
+
+ENCODING_RAW = 0
+ENCODING_BITS = 1
+ENCODING_BITS_ZLIB = 2
+
+
+def _pack(mask: np.ndarray, compress: bool) -> tuple:
+    data = np.packbits(mask.reshape(-1)).tobytes()
+    if compress:
+        return ENCODING_BITS_ZLIB, zlib.compress(data)
+    return ENCODING_BITS, data
+
+
+def _unpack(data: bytes, encoding: int, size: tuple) -> np.ndarray:
+    if encoding == ENCODING_BITS_ZLIB:
+        data = zlib.decompress(data)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=size[0] * size[1])
+    return bits.astype(bool).reshape(size)
+
+
+def _header_seed(seed) -> int:
+    return seed if isinstance(seed, int) and 0 <= seed < 1 << 63 else -1
+
+
+def _layers(game: gl.Game, layout: int, compress: bool) -> list:
+    layers = []
+    if isinstance(game.seed, int) and game.seed >= 0 and _header_seed(game.seed) < 0:
+        # Seeds that do not fit the header field, e.g. SeedSequence entropy, go to their own layer
+        layers.append((b'seed', ENCODING_RAW, game.seed.to_bytes((game.seed.bit_length() + 7) // 8, 'little')))
+    if layout == LAYOUT_PACKED:
+        if game.mine_mask is not None:
+            layers.append((b'mines', *_pack(game.mine_mask, compress)))
+        revealed = (game.state < gl.UNEXPLORED_CODE) | (game.state == gl.MINE_CODE)
+        layers.append((b'revealed', *_pack(revealed, compress)))
+        layers.append((b'flags', *_pack(game.state == gl.FLAG_CODE, compress)))
+    else:
+        if game.mine_mask is not None:
+            layers.append((b'mines', ENCODING_RAW, _raw(game.mine_mask)))
+            layers.append((b'counts', ENCODING_RAW, _raw(game.neighbor_counts)))
+        layers.append((b'state', ENCODING_RAW, _raw(game.state)))
+    return layers
+
+
+def _raw(array: np.ndarray) -> memoryview:
+    return memoryview(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+
+
+def _header(game: gl.Game, layout: int, layer_count: int) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, layout, game.size[0], game.size[1], game.num_of_mines,
+                       _header_seed(game.seed), game.safe_radius, game.first_click, game.end_game, game.game_won, layer_count,
+                       game.revealed_cells, game.flagged_cells, game.correct_flags)
+
+
+def _mapped_from(game: gl.Game, path: str) -> bool:
+    return (isinstance(game.state, np.memmap) and game.state.mode == 'r+'
+            and game.state.filename == os.path.abspath(path))
+
+
+def save_game(game: gl.Game, path: str, layout: str = 'packed', compress: bool = False) -> None:
+    """Writes game to path. A game memory-mapped from path with mode 'r+' only flushes its touched pages."""
+    layout = LAYOUTS[layout]
+    layers = _layers(game, layout, compress)
+    mapped = layout == LAYOUT_RAW and _mapped_from(game, path)
+    if mapped:
+        with open(path, 'r+b') as file:
+            layer_count = HEADER.unpack(file.read(HEADER.size))[11]
+            names = [LAYER.unpack(file.read(LAYER.size))[0].rstrip(b'\0') for _ in range(layer_count)]
+            # A game saved before its first click has no mines or counts yet, so the file needs rewriting
+            if names == [name for name, _, _ in layers]:
+                for array in (game.mine_mask, game.neighbor_counts, game.state):
+                    if isinstance(array, np.memmap):
+                        array.flush()
+                file.seek(0)
+                file.write(_header(game, layout, layer_count))
+                return
+
+    offset = HEADER.size + LAYER.size * len(layers)
+    table = []
+    for name, encoding, data in layers:
+        table.append(LAYER.pack(name, encoding, offset, len(data)))
+        offset += len(data)
+
+    # The layers of a mapped game still point into path, so they are written next to it first
+    target = path + '.tmp' if mapped else path
+    with open(target, 'wb') as file:
+        file.write(_header(game, layout, len(layers)))
+        file.write(b''.join(table))
+        for _, _, data in layers:
+            file.write(data)
+    if mapped:
+        os.replace(target, path)
+        restored = load_game(path, mmap_mode='r+')
+        game.state, game.mine_mask, game.neighbor_counts = restored.state, restored.mine_mask, restored.neighbor_counts
+
+
+def load_game(path: str, mmap_mode: str = None) -> gl.Game:
+    """
+    Restores a game saved by save_game. With a 'raw' snapshot, mmap_mode ('r', 'r+' or 'c')
+    memory-maps the board layers instead of reading them.
+    """
+    with open(path, 'rb') as file:
+        header = HEADER.unpack(file.read(HEADER.size))
+        (magic, version, layout, rows, cols, mines, seed, safe_radius, first_click, end_game, game_won,
+         layer_count, revealed, flags, correct_flags) = header
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Minesweeper snapshot")
+        if version > VERSION:
+            raise ValueError(f"{path} has snapshot version {version}, newer than the supported {VERSION}")
+        table = {}
+        for _ in range(layer_count):
+            name, encoding, offset, length = LAYER.unpack(file.read(LAYER.size))
+            table[name.rstrip(b'\0').decode()] = (encoding, offset, length)
+
+        if 'seed' in table:
+            _, offset, length = table['seed']
+            file.seek(offset)
+            seed = int.from_bytes(file.read(length), 'little')
+
+        size = (rows, cols)
+        if layout == LAYOUT_RAW:
+            def read(name: str, dtype) -> np.ndarray:
+                _, offset, _ = table[name]
+                if mmap_mode:
+                    return np.memmap(path, dtype=dtype, mode=mmap_mode, offset=offset, shape=size)
+                file.seek(offset)
+                return np.fromfile(file, dtype=dtype, count=rows * cols).reshape(size)
+
+            state = read('state', np.uint8)
+            mine_mask = read('mines', bool) if 'mines' in table else None
+            neighbor_counts = read('counts', np.uint8) if 'mines' in table else None
+        else:
+            def read(name: str) -> np.ndarray:
+                encoding, offset, length = table[name]
+                file.seek(offset)
+                return _unpack(file.read(length), encoding, size)
+
+            mine_mask = read('mines') if 'mines' in table else None
+            neighbor_counts = gl.count_neighbors(mine_mask) if mine_mask is not None else None
+            revealed_mask, flag_mask = read('revealed'), read('flags')
+            state = np.full(size, gl.UNEXPLORED_CODE, dtype=np.uint8)
+            state[flag_mask] = gl.FLAG_CODE
+            if mine_mask is not None:
+                state[revealed_mask] = neighbor_counts[revealed_mask]
+                state[revealed_mask & mine_mask] = gl.MINE_CODE
+
+    game = gl.Game(size, mines, seed=None if seed < 0 else seed, safe_radius=safe_radius, state=state)
+    game.mine_mask = mine_mask
+    game.neighbor_counts = neighbor_counts
+    game.first_click = bool(first_click)
+    game.end_game = bool(end_game)
+    game.game_won = bool(game_won)
+    game._revealed, game._flags, game._correct_flags = revealed, flags, correct_flags
+    return game
@@ -0,0 +1,307 @@
+import math
+from collections import deque, namedtuple
+
+import numpy as np
+
+import game_logic as gl
+
+# What the solver found for the current position: cells that are certainly safe or mines, as (x, y)
+# positions, and, when nothing is certain, the cell least likely to be a mine with that probability
+SolverStep = namedtuple('SolverStep', ['safe', 'mines', 'guess', 'probability'])
+
+
+class Solver:
+    """
+    Constraint solver that plays a Game through do_action.
+
+    It keeps one constraint per revealed number that still borders unexplored cells and only rebuilds
+    the constraints around the cells reported by Game.pop_changes, so it owns the game's change log.
+    Certain cells come from single-constraint and subset deductions; otherwise every independent
+    frontier component of at most max_component_cells cells is enumerated exactly and the
+    components are combined with the number of mines left.
+    """
+
+    def __init__(self, game: gl.Game, max_component_cells: int = 18, rng=None) -> None:
+        self.game = game
+        self.max_component_cells = max_component_cells
+        self.rng = np.random.default_rng(rng)
+        self._rows, self._cols = game.size
+        self._state = game.state.reshape(-1)
+        # Revealed cell -> (frozenset of unexplored neighbours, mines among them)
+        self._constraints = {}
+        self._dirty = set()
+        self._pending = deque()
+
+        game.pop_changes()
+        self._mark_dirty(np.flatnonzero(game.state < gl.UNEXPLORED_CODE).tolist())
+
+    def _position(self, cell: int) -> tuple:
+        return divmod(cell, self._cols)
+
+    def _neighbours(self, cell: int) -> list:
+        x, y = divmod(cell, self._cols)
+        return [i * self._cols + j
+                for i in range(max(x - 1, 0), min(x + 2, self._rows))
+                for j in range(max(y - 1, 0), min(y + 2, self._cols))
+                if i != x or j != y]
+
+    def _mark_dirty(self, cells: list) -> None:
+        for cell in cells:
+            self._dirty.add(cell)
+            self._dirty.update(self._neighbours(cell))
+
+    def _rebuild(self, cell: int) -> None:
+        code = self._state[cell]
+        self._constraints.pop(cell, None)
+        if code >= gl.UNEXPLORED_CODE:
+            return
+        unknown, flags = [], 0
+        for near in self._neighbours(cell):
+            if self._state[near] == gl.UNEXPLORED_CODE:
+                unknown.append(near)
+            elif self._state[near] == gl.FLAG_CODE:
+                flags += 1
+        if unknown:
+            self._constraints[cell] = (frozenset(unknown), int(code) - flags)
+
+    def _deduce(self) -> tuple:
+        dirty, self._dirty = self._dirty, set()
+        for cell in dirty:
+            self._rebuild(cell)
+
+        safe, mines = set(), set()
+        for cell in dirty:
+            if cell not in self._constraints:
+                continue
+            unknown, left = self._constraints[cell]
+            if left == 0:
+                safe |= unknown
+            elif left == len(unknown):
+                mines |= unknown
+
+            # Subset rule against the constraints that share cells with this one (two cells away at most)
+            x, y = divmod(cell, self._cols)
+            for i in range(max(x - 2, 0), min(x + 3, self._rows)):
+                for j in range(max(y - 2, 0), min(y + 3, self._cols)):
+                    other = self._constraints.get(i * self._cols + j)
+                    if other is None or other[0] == unknown:
+                        continue
+                    if unknown < other[0]:
+                        inner, outer = (unknown, left), other
+                    elif other[0] < unknown:
+                        inner, outer = other, (unknown, left)
+                    else:
+                        continue
+                    rest = outer[0] - inner[0]
+                    if outer[1] == inner[1]:
+                        safe |= rest
+                    elif outer[1] - inner[1] == len(rest):
+                        mines |= rest
+        return safe, mines
+
+    def _components(self) -> list:
+        cell_constraints = {}
+        for owner, (unknown, _) in self._constraints.items():
+            for cell in unknown:
+                cell_constraints.setdefault(cell, []).append(owner)
+
+        components, seen = [], set()
+        for start in cell_constraints:
+            if start in seen:
+                continue
+            seen.add(start)
+            cells, owners, queue = [], set(), deque([start])
+            while queue:
+                cell = queue.popleft()
+                cells.append(cell)
+                for owner in cell_constraints[cell]:
+                    if owner in owners:
+                        continue
+                    owners.add(owner)
+                    for near in self._constraints[owner][0]:
+                        if near not in seen:
+                            seen.add(near)
+                            queue.append(near)
+            components.append((cells, [self._constraints[owner] for owner in owners]))
+        return components
+
+    @staticmethod
+    def _enumerate(cells: list, constraints: list) -> dict:
+        """Solutions of one component by mine count: {mines: [solutions, per-cell mine counts]}."""
+        index = {cell: i for i, cell in enumerate(cells)}
+        cell_constraints = [[] for _ in cells]
+        need, free = [], []
+        for j, (unknown, left) in enumerate(constraints):
+            for cell in unknown:
+                cell_constraints[index[cell]].append(j)
+            need.append(left)
+            free.append(len(unknown))
+
+        assignment = [0] * len(cells)
+        totals = {}
+
+        def visit(i: int, mines: int) -> None:
+            if i == len(cells):
+                entry = totals.setdefault(mines, [0, [0] * len(cells)])
+                entry[0] += 1
+                for a, value in enumerate(assignment):
+                    entry[1][a] += value
+                return
+            for value in (0, 1):
+                if any(need[j] - value < 0 or need[j] - value > free[j] - 1 for j in cell_constraints[i]):
+                    continue
+                for j in cell_constraints[i]:
+                    need[j] -= value
+                    free[j] -= 1
+                assignment[i] = value
+                visit(i + 1, mines + value)
+                for j in cell_constraints[i]:
+                    need[j] += value
+                    free[j] += 1
+            assignment[i] = 0
+
+        visit(0, 0)
+        return totals
+
+    def probabilities(self) -> tuple:
+        """
+        Mine probability of every frontier cell, {cell: probability}, and of any other unexplored cell.
+        Components over the size cap get the local estimate of their most pessimistic constraint.
+        """
+        unexplored = self.game.state.size - self.game.revealed_cells - self.game.flagged_cells
+        mines_left = self.game.remaining_mines
+        probability = {}
+        solved = []
+        outside = unexplored
+        for cells, constraints in self._components():
+            if len(cells) > self.max_component_cells:
+                for unknown, left in constraints:
+                    for cell in unknown:
+                        probability[cell] = max(probability.get(cell, 0.0), left / len(unknown))
+                continue
+            totals = self._enumerate(cells, constraints)
+            if not totals:
+                continue
+            solved.append((cells, totals))
+            outside -= len(cells)
+
+        # Number of solutions of each component by its mine count, as float polynomials
+        polynomials = []
+        for _, totals in solved:
+            polynomial = np.zeros(max(totals) + 1)
+            for mines, (count, _) in totals.items():
+                polynomial[mines] = count
+            polynomials.append(polynomial / polynomial.max())
+
+        def weights(length: int) -> np.ndarray:
+            # Relative number of ways to place the remaining mines outside the solved components
+            log_weights = np.full(length, -np.inf)
+            for t in range(length):
+                rest = mines_left - t
+                if 0 <= rest <= outside:
+                    log_weights[t] = (math.lgamma(outside + 1) - math.lgamma(rest + 1)
+                                      - math.lgamma(outside - rest + 1))
+            if np.isinf(log_weights).all():
+                return np.zeros(length)
+            return np.exp(log_weights - log_weights.max())
+
+        def product(skip: int = None) -> np.ndarray:
+            result = np.ones(1)
+            for i, polynomial in enumerate(polynomials):
+                if i != skip:
+                    result = np.convolve(result, polynomial)
+                    result /= result.max()
+            return result
+
+        for c, (cells, totals) in enumerate(solved):
+            others = product(skip=c)
+            weight = weights(max(totals) + others.size)
+            total = 0.0
+            per_cell = np.zeros(len(cells))
+            for mines, (count, cell_counts) in totals.items():
+                factor = float(np.dot(others, weight[mines:mines + others.size]))
+                total += count * factor
+                per_cell += np.array(cell_counts, dtype=float) * factor
+            for cell, value in zip(cells, per_cell / total if total else per_cell):
+                probability[cell] = float(value)
+
+        outside_probability = None
+        if outside > 0:
+            everything = product()
+            weight = weights(everything.size)
+            rest = np.clip(mines_left - np.arange(everything.size), 0, None) / outside
+            norm = float(np.dot(everything, weight))
+            outside_probability = float(np.dot(everything * weight, rest) / norm) if norm else mines_left / outside
+        return probability, outside_probability
+
+    def _best_guess(self) -> tuple:
+        probability, outside_probability = self.probabilities()
+        cell, best = None, None
+        if probability:
+            cell = min(probability, key=lambda c: (probability[c], c))
+            best = probability[cell]
+        if outside_probability is not None and (best is None or outside_probability < best):
+            covered = np.flatnonzero(self.game.state == gl.UNEXPLORED_CODE)
+            covered = covered[~np.isin(covered, list(probability))]
+            if covered.size:
+                cell, best = int(self.rng.choice(covered)), outside_probability
+        return cell, best
+
+    def analyse(self) -> SolverStep:
+        """Updates the frontier from the game's latest changes and reports what follows from it."""
+        self._mark_dirty(self.game.pop_changes().tolist())
+        safe, mines = self._deduce()
+        if safe or mines:
+            return SolverStep(sorted(map(self._position, safe)), sorted(map(self._position, mines)), None, None)
+        cell, probability = self._best_guess()
+        guess = None if cell is None else self._position(cell)
+        return SolverStep([], [], guess, probability)
+
+    def next_action(self) -> tuple:
+        """Next (pos, action) for do_action: flags certain mines, opens certain safe cells, then guesses."""
+        if self.game.first_click:
+            return (self._rows // 2, self._cols // 2), 'o'
+        while True:
+            while self._pending:
+                pos, action = self._pending.popleft()
+                if self.game.state[pos] == gl.UNEXPLORED_CODE:
+                    return pos, action
+            step = self.analyse()
+            self._pending.extend((pos, 'f') for pos in step.mines)
+            self._pending.extend((pos, 'o') for pos in step.safe)
+            if step.guess is not None:
+                return step.guess, 'o'
+            if not self._pending:
+                return None
+
+    def play(self) -> bool:
+        """Plays the game to the end, sending all certain moves of a step as one batch, and returns whether it was won."""
+        if self.game.first_click:
+            self.game.do_action((self._rows // 2, self._cols // 2), 'o')
+        while not self.game.end_game:
+            step = self.analyse()
+            moves = [(pos, 'f') for pos in step.mines] + [(pos, 'o') for pos in step.safe]
+            if not moves and step.guess is not None:
+                moves = [(step.guess, 'o')]
+            if not moves:
+                break
+            positions, actions = zip(*moves)
+            self.game.do_actions(positions, actions)
+        return self.game.game_won
+
+    def play_logically(self) -> bool:
+        """
+        Plays only certain moves and returns whether that wins the game, i.e. whether the board
+        can be solved from its current position without guessing.
+        """
+        while not self.game.end_game:
+            step = self.analyse()
+            moves = [(pos, 'f') for pos in step.mines] + [(pos, 'o') for pos in step.safe]
+            if not moves and step.guess is not None and step.probability == 0:
+                # Exact enumeration can prove a cell safe where the simple deductions cannot
+                moves = [(step.guess, 'o')]
+            if not moves:
+                return False
+            positions, actions = zip(*moves)
+            self.game.do_actions(positions, actions)
+        return self.game.game_won
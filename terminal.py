@@ -0,0 +1,172 @@
+"""
+Terminal frontend for watching games on boards of any size.
+
+Cells are drawn through a byte lookup table indexed by the state codes, so a full frame is one fancy
+index and one tobytes() over the viewport. After that only the cells reported by
+Game.changes_since are rewritten, each behind a cursor-addressing escape, and refresh() skips frames
+that come sooner than 1 / max_fps after the previous one. The viewport shows board columns x0.. and
+rows y0.., and follow() scrolls it so that a position stays on screen.
+"""
+import argparse
+import shutil
+import sys
+import time
+
+import numpy as np
+
+import game_logic as gl
+
+# Glyph of every state code: 0-8, unexplored, flag, mine
+GLYPHS = '.12345678#F*'
+# ANSI colour of every state code, used when colour is on. The mine's is a background colour, so every
+# glyph resets the attributes before setting its own, or the cells drawn after a mine would stay on red
+COLORS = [37, 94, 32, 91, 34, 31, 36, 30, 90, 92, 93, 41]
+
+
+def glyph_table(color: bool) -> np.ndarray:
+    """(codes, width) uint8 table: the bytes that draw each state code, all padded to the same width."""
+    if color:
+        glyphs = [f'\x1b[0;{code}m{glyph}' for glyph, code in zip(GLYPHS, COLORS)]
+    else:
+        glyphs = list(GLYPHS)
+    # Shorter glyphs are NUL-padded to a common width; the padding is dropped when a frame is written
+    width = max(len(glyph) for glyph in glyphs)
+    return np.array([list(glyph.rjust(width, '\0').encode()) for glyph in glyphs], dtype=np.uint8)
+
+
+class TerminalView:
+    def __init__(self, game: gl.Game, out=None, color: bool = True, max_fps: float = 30.0,
+                 size: tuple = None) -> None:
+        self.game = game
+        self.out = out if out is not None else sys.stdout.buffer
+        self.table = glyph_table(color)
+        self.reset = b'\x1b[0m' if color else b''
+        self.max_fps = max_fps
+        if size is None:
+            columns, lines = shutil.get_terminal_size()
+            # The last line holds the status
+            size = (columns, lines - 1)
+        self.columns = min(size[0], game.size[0])
+        self.rows = min(size[1], game.size[1])
+        self.x0 = 0
+        self.y0 = 0
+        self.version = None
+        self.frames = 0
+        self.bytes_written = 0
+        self._last_refresh = 0.0
+
+    def scroll(self, dx: int, dy: int) -> None:
+        self.move_to(self.x0 + dx, self.y0 + dy)
+
+    def move_to(self, x0: int, y0: int) -> None:
+        x0 = min(max(x0, 0), self.game.size[0] - self.columns)
+        y0 = min(max(y0, 0), self.game.size[1] - self.rows)
+        if (x0, y0) != (self.x0, self.y0):
+            self.x0, self.y0 = x0, y0
+            # Everything on screen is stale after a scroll
+            self.version = None
+
+    def follow(self, pos: tuple, margin: int = 2) -> None:
+        """Scrolls as little as possible to keep pos at least margin cells inside the viewport."""
+        x0, y0 = self.x0, self.y0
+        if pos[0] < x0 + margin:
+            x0 = pos[0] - margin
+        elif pos[0] >= x0 + self.columns - margin:
+            x0 = pos[0] - self.columns + margin + 1
+        if pos[1] < y0 + margin:
+            y0 = pos[1] - margin
+        elif pos[1] >= y0 + self.rows - margin:
+            y0 = pos[1] - self.rows + margin + 1
+        self.move_to(x0, y0)
+
+    @staticmethod
+    def _strip(data: np.ndarray) -> bytes:
+        return data[data != 0].tobytes()
+
+    def render_full(self) -> bytes:
+        view = self.game.state[self.x0:self.x0 + self.columns, self.y0:self.y0 + self.rows].T
+        glyphs = self.table[view].reshape(self.rows, -1)
+        lines = np.concatenate([glyphs, np.full((self.rows, 1), ord('\n'), dtype=np.uint8)], axis=1)
+        return b'\x1b[H' + self._strip(lines) + self.reset
+
+    def render_changes(self, cells: np.ndarray) -> bytes:
+        x, y = np.divmod(cells, self.game.size[1])
+        inside = (x >= self.x0) & (x < self.x0 + self.columns) & (y >= self.y0) & (y < self.y0 + self.rows)
+        x, y = x[inside], y[inside]
+        glyphs = self.table[self.game.state[x, y]]
+        parts = [b'\x1b[%d;%dH%s' % (row, column, self._strip(glyph))
+                 for row, column, glyph in zip((y - self.y0 + 1).tolist(), (x - self.x0 + 1).tolist(), glyphs)]
+        return b''.join(parts) + self.reset
+
+    def status(self) -> bytes:
+        game = self.game
+        text = (f'{game.size[0]}x{game.size[1]} at ({self.x0},{self.y0})  revealed {game.revealed_cells}  '
+                f'flags {game.flagged_cells}/{game.num_of_mines}  v{game.version}'
+                f'{"  won" if game.game_won else "  lost" if game.end_game else ""}')
+        return b'\x1b[%d;1H\x1b[2K' % (self.rows + 1) + text[:self.columns].encode()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Writes the cells changed since the last refresh; returns False when skipped by the frame cap."""
+        now = time.perf_counter()
+        if not force and self.max_fps and now - self._last_refresh < 1 / self.max_fps:
+            return False
+        self._last_refresh = now
+
+        version = self.game.version
+        if self.version is None:
+            frame = b'\x1b[2J' + self.render_full()
+        else:
+            cells = self.game.journal.changed_cells(self.version)
+            # Past a quarter of the viewport one full frame is cheaper than addressing every cell
+            if cells.size * 4 > self.columns * self.rows:
+                frame = self.render_full()
+            else:
+                frame = self.render_changes(cells)
+        frame += self.status()
+        self.out.write(frame)
+        self.out.flush()
+        self.version = version
+        self.frames += 1
+        self.bytes_written += len(frame)
+        return True
+
+
+def main() -> None:
+    from simulate import POLICIES
+
+    parser = argparse.ArgumentParser(description='Watch a headless Minesweeper game in the terminal')
+    parser.add_argument('--size', type=int, nargs=2, default=(200, 200))
+    parser.add_argument('--mines', type=int, default=6000)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='solver')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fps', type=float, default=30.0, help='refresh rate cap')
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait after every move')
+    parser.add_argument('--no-color', action='store_true')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    game = gl.Game(tuple(args.size), args.mines, seed=args.seed, verbose=False)
+    next_action = POLICIES[args.policy](game, rng)
+    view = TerminalView(game, color=not args.no_color, max_fps=args.fps)
+    sys.stdout.buffer.write(b'\x1b[?25l')
+    start = time.perf_counter()
+    try:
+        while not game.end_game:
+            move = next_action()
+            if move is None:
+                break
+            game.do_action(*move)
+            view.follow(move[0])
+            view.refresh()
+            if args.delay:
+                time.sleep(args.delay)
+        view.refresh(force=True)
+    finally:
+        sys.stdout.buffer.write(b'\x1b[?25h\n')
+        sys.stdout.buffer.flush()
+    elapsed = time.perf_counter() - start
+    print(f'{game.version} moves, {view.frames} frames, {view.bytes_written / 1024:.0f} KiB written in {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import numpy as np
+
+import game_logic as gl
+from chunked import ChunkedGame
+
+
+def test_window_before_first_click_keeps_the_safe_zone():
+    for seed in range(50):
+        game = ChunkedGame(density=0.3, seed=seed, chunk_size=16)
+        assert (game.window(-8, -8, 16, 16) == gl.UNEXPLORED_CODE).all()
+        game.do_action((0, 0), 'o')
+        assert not game.end_game
+        chunk, x, y = game._locate((0, 0))
+        assert chunk.neighbor_counts[x, y] == 0
+
+
+def test_window_before_first_click_gives_the_same_board():
+    viewed = ChunkedGame(density=0.3, seed=7, chunk_size=16)
+    viewed.window(-20, -20, 40, 40)
+    viewed.do_action((3, 3), 'o')
+    fresh = ChunkedGame(density=0.3, seed=7, chunk_size=16)
+    fresh.do_action((3, 3), 'o')
+    assert np.array_equal(viewed.window(-20, -20, 40, 40), fresh.window(-20, -20, 40, 40))
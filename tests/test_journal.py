@@ -0,0 +1,41 @@
+import numpy as np
+
+import game_logic as gl
+from journal import Journal
+
+
+def _play(seed: int) -> gl.Game:
+    game = gl.Game((16, 16), 40, seed=seed, verbose=False)
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        if game.end_game:
+            break
+        game.do_action((int(rng.integers(16)), int(rng.integers(16))), str(rng.choice(['o', 'f', 'r'])))
+    game.undo()
+    return game
+
+
+def test_loaded_journal_continues_the_game():
+    for seed in range(20):
+        game = _play(seed)
+        loaded = gl.Game((16, 16), 40, seed=seed, verbose=False)
+        loaded.load_journal(Journal.from_bytes(game.journal.to_bytes()))
+        while True:
+            assert np.array_equal(loaded.state, game.state)
+            assert (loaded.revealed_cells, loaded.flagged_cells, loaded.correct_flags, loaded.end_game) == \
+                (game.revealed_cells, game.flagged_cells, game.correct_flags, game.end_game)
+            if not game.undo():
+                break
+            assert loaded.undo()
+        assert not loaded.undo()
+
+
+def test_append_copies_positions_and_actions():
+    game = gl.Game((16, 16), 40, seed=0, verbose=False)
+    positions = np.array([[3, 3], [5, 5]])
+    actions = np.array([gl.ACTION_CODES['f'], gl.ACTION_CODES['f']], dtype=np.uint8)
+    game.do_actions(positions, actions)
+    data = game.journal.to_bytes()
+    positions[:] = 0
+    actions[:] = 0
+    assert game.journal.to_bytes() == data
@@ -0,0 +1,28 @@
+import io
+
+import numpy as np
+
+import game_logic as gl
+from terminal import TerminalView
+
+
+def _view(states: list, color: bool = True) -> TerminalView:
+    game = gl.Game((len(states), 1), 0, verbose=False)
+    game.state[:, 0] = states
+    return TerminalView(game, out=io.BytesIO(), color=color, size=(len(states), 1))
+
+
+def test_cell_after_a_mine_is_not_drawn_on_red():
+    view = _view([gl.MINE_CODE, 1])
+    assert view.render_full() == b'\x1b[H\x1b[0;41m*\x1b[0;94m1\n\x1b[0m'
+
+
+def test_changed_cells_reset_the_mine_background():
+    view = _view([gl.MINE_CODE, 1])
+    frame = view.render_changes(np.array([0, 1]))
+    assert frame == b'\x1b[1;1H\x1b[0;41m*\x1b[1;2H\x1b[0;94m1\x1b[0m'
+
+
+def test_plain_glyphs_without_color():
+    view = _view([gl.MINE_CODE, 1], color=False)
+    assert view.render_full() == b'\x1b[H*1\n'
@@ -0,0 +1,181 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pygame
+
+# Зображення клітинок поля разом з їхніми варіантами при наведенні
+TILE_IMAGES = [str(i) for i in range(9)] + ['default', 'flag', 'mine']
+TILE_IMAGES += [f'hover_{name}' for name in TILE_IMAGES]
+# Цифри дисплеїв
+DIGIT_IMAGES = [f'{i}.1' for i in range(10)]
+# Заставки, їхні варіанти при наведенні та іконки дисплеїв
+HUD_IMAGES = ['start', 'lose', 'success', 'hover_start', 'hover_lose', 'hover_success', 'clock', 'flag64-1']
+# Звуки гри: ім'я атрибута Settings -> файл у sounds/
+SOUND_FILES = {
+    'explosion_sound': 'explosion',
+    'click_sound': 'click',
+    'flag_sound': 'flag',
+    'flag_sound_backwards': 'flag_backwards',
+}
+
+# Один фоновий потік на все повільне завантаження, щоб перше вікно не чекало на диск
+_background = None
+
+
+def run_in_background(function, *args) -> Future:
+    global _background
+    if _background is None:
+        _background = ThreadPoolExecutor(1, thread_name_prefix='assets')
+    return _background.submit(function, *args)
+
+
+def _load_sounds(sounds_dir: str) -> dict:
+    return {name: pygame.mixer.Sound(f'{sounds_dir}/{file}.wav') for name, file in SOUND_FILES.items()}
+
+
+def load_sounds(sounds_dir: str = 'sounds') -> Future:
+    """
+        Відкриває мікшер і запускає декодування звуків у фоні; result() майбутнього дає словник з ключами SOUND_FILES
+    """
+    # Мікшер ініціалізується в головному потоці: SDL не дозволяє робити це паралельно з display.set_mode,
+    # тож у фоновий потік іде лише декодування файлів
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    return run_in_background(_load_sounds, sounds_dir)
+
+
+class Assets:
+    """
+        Спільний кеш зображень: кожен PNG декодується з диска один раз,
+        а кожен потрібний розмір масштабується один раз і зберігається вже сконвертованим під екран
+    """
+    def __init__(self, images_dir: str = 'images') -> None:
+        self.images_dir = images_dir
+        self._images = {}
+        self._scaled = {}
+        self._fonts = {}
+        # Майбутнє з PNG, що декодуються у фоні, та імена, які воно поверне
+        self._decoding = None
+        self._decoding_names = set()
+
+        # Лічильники, що дозволяють перевірити відсутність роботи з диском у головному циклі
+        self.disk_loads = 0
+        self.scales = 0
+
+    def _load(self, name: str, alpha: bool) -> pygame.Surface:
+        key = (name, alpha)
+        if key not in self._images:
+            if name in self._decoding_names:
+                # Декодування вже йде у фоні; тут лишається тільки конвертація під екран
+                image = self._decoding.result()[name]
+            else:
+                image = pygame.image.load(f'{self.images_dir}/{name}.png')
+            self._images[key] = image.convert_alpha() if alpha else image.convert()
+            self.disk_loads += 1
+        return self._images[key]
+
+    def get(self, name: str, size: tuple = None, alpha: bool = False) -> pygame.Surface:
+        """
+            Повертає зображення з кешу, за потреби масштабоване до size
+        """
+        image = self._load(name, alpha)
+        if size is None or image.get_size() == tuple(size):
+            return image
+        key = (name, tuple(size), alpha)
+        if key not in self._scaled:
+            self._scaled[key] = pygame.transform.scale(image, size)
+            self.scales += 1
+        return self._scaled[key]
+
+    def preload(self, names: list, size: tuple = None, alpha: bool = False) -> None:
+        """
+            Завантажує зображення наперед, щоб головний цикл брав їх лише з пам'яті
+        """
+        for name in names:
+            self.get(name, size, alpha)
+
+    def decode_async(self, names: list) -> Future:
+        """
+            Декодує PNG у фоновому потоці, поки головний уже показує вікно.
+            Конвертація під екран лишається за get, бо вона має йти в головному потоці
+        """
+        names = [name for name in names if name not in self._decoding_names]
+        self._decoding_names.update(names)
+        previous = self._decoding
+
+        def decode() -> dict:
+            images = previous.result() if previous else {}
+            images.update((name, pygame.image.load(f'{self.images_dir}/{name}.png')) for name in names)
+            return images
+        self._decoding = run_in_background(decode)
+        return self._decoding
+
+    def font(self, name: str = None, size: int = 22, bold: bool = False) -> pygame.font.Font:
+        """
+            Шрифт з кешу: name=None - вбудований шрифт pygame, інакше системний через SysFont
+        """
+        key = (name, size, bold)
+        if key not in self._fonts:
+            if name is None:
+                font = pygame.font.Font(None, size)
+                font.set_bold(bold)
+            else:
+                font = pygame.font.SysFont(name, size, bold=bold)
+            self._fonts[key] = font
+        return self._fonts[key]
+
+
+def _scale_tiles(sources: dict, size: int) -> dict:
+    return {name: image if image.get_size() == (size, size) else pygame.transform.scale(image, (size, size))
+            for name, image in sources.items()}
+
+
+class TileCache:
+    """
+        LRU кеш наборів клітинок поля, масштабованих до кожного розміру клітинки (рівня масштабу).
+        prefetch готує набори у фоновому потоці, тож зміна масштабу бере їх уже готовими,
+        а в кеші лишаються лише capacity останніх використаних розмірів
+    """
+    def __init__(self, assets: Assets, names: list, capacity: int = 4) -> None:
+        self.assets = assets
+        self.names = list(names)
+        self.capacity = capacity
+        # Розмір -> словник зображень або майбутнє, що його поверне
+        self._sets = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _sources(self) -> dict:
+        # Оригінали конвертуються під екран у головному потоці, фоновий їх лише масштабує
+        return {name: self.assets.get(name) for name in self.names}
+
+    def _evict(self) -> None:
+        while len(self._sets) > self.capacity:
+            self._sets.popitem(last=False)
+
+    def prefetch(self, sizes: list) -> None:
+        """
+            Починає масштабувати у фоні набори тих розмірів, яких ще немає в кеші
+        """
+        for size in sizes:
+            if size not in self._sets:
+                self._sets[size] = run_in_background(_scale_tiles, self._sources(), size)
+        self._evict()
+
+    def get(self, size: int) -> dict:
+        """
+            Набір клітинок розміру size x size: з кешу, з фонового масштабування або, при першому промаху, одразу
+        """
+        tiles = self._sets.get(size)
+        if tiles is None:
+            self.misses += 1
+            tiles = _scale_tiles(self._sources(), size)
+            self.assets.scales += len(tiles)
+        else:
+            self.hits += 1
+            if isinstance(tiles, Future):
+                tiles = tiles.result()
+        self._sets[size] = tiles
+        self._sets.move_to_end(size)
+        self._evict()
+        return tiles
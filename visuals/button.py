@@ -18,7 +18,7 @@ class Button(Sprite):
         self.image_name = image_name
         self.hover_image_name = hover_image_name
 
-        self.image = pygame.image.load(f'images/{self.image_name}.png').convert()
+        self.image = self.game_settings.tile_images[self.image_name]
         self.actual_image = actual_image
         self.is_hover = False
         self.is_revealed = False
@@ -34,16 +34,15 @@ class Button(Sprite):
         """
             Зміна зображення кнопки
         """
-        self.image = pygame.image.load(f'images/{file_name}.png').convert()
+        self.image = self.game_settings.tile_images[file_name]
         self.image_name = file_name
         self.hover_image_name = f'hover_{self.image_name}'
         self.is_hover = False
         self.rescale()
 
     def rescale(self):
-        self.image = pygame.transform.scale(self.image, (32, 32)).convert()
-        self.rect.width = 32
-        self.rect.height = 32
+        self.rect.width = self.game_settings.button_w
+        self.rect.height = self.game_settings.button_h
 
     def hover(self) -> None:
         """
@@ -51,7 +50,7 @@ class Button(Sprite):
         """
         if not self.is_hover:
             self.is_hover = True
-            self.image = pygame.image.load(f'images/{self.hover_image_name}.png').convert()
+            self.image = self.game_settings.tile_images[self.hover_image_name]
             self.rescale()
 
     def stop_hover(self) -> None:
@@ -60,7 +59,7 @@ class Button(Sprite):
         """
         if self.is_hover:
             self.is_hover = False
-            self.image = pygame.image.load(f'images/{self.image_name}.png').convert()
+            self.image = self.game_settings.tile_images[self.image_name]
             self.rescale()
 
     def on_click(self) -> None:
@@ -88,9 +87,9 @@ class NewGameButton(Sprite):
         self.image_name = image_name
         self.hover_image_name = f'hover_{self.image_name}'
 
-        self.image = pygame.image.load(f'images/{self.image_name}.png').convert_alpha()
-        self.image = pygame.transform.scale(self.image,
-                                      (self.image.get_rect().width*self.scale, self.image.get_rect().height*self.scale))
+        # Обидва зображення масштабуються один раз тут, а наведення лише перемикає їх
+        self.images = {name: self._scaled_image(name) for name in (self.image_name, self.hover_image_name)}
+        self.image = self.images[self.image_name]
         self.is_hover = False
         self.rect = self.image.get_rect(center=(x,y))
 
@@ -102,7 +101,7 @@ class NewGameButton(Sprite):
         """
         if not self.is_hover:
             self.is_hover = True
-            self.image = pygame.image.load(f'images/{self.hover_image_name}.png').convert_alpha()
+            self.image = self.images[self.hover_image_name]
             self.rescale()
 
     def stop_hover(self) -> None:
@@ -111,14 +110,15 @@ class NewGameButton(Sprite):
         """
         if self.is_hover:
             self.is_hover = False
-            self.image = pygame.image.load(f'images/{self.image_name}.png').convert_alpha()
+            self.image = self.images[self.image_name]
             self.rescale()
 
     def draw_me(self):
         self.screen.blit(self.image, self.rect)
 
+    def _scaled_image(self, image_name: str) -> pygame.Surface:
+        width, height = self.game_settings.assets.get(image_name, alpha=True).get_size()
+        return self.game_settings.assets.get(image_name, (width * self.scale, height * self.scale), alpha=True)
+
     def rescale(self):
-        self.image = pygame.transform.scale(self.image,
-                                      (self.image.get_rect().width * self.scale, self.image.get_rect().height * self.scale))
-        self.rect.width = 128*self.scale
-        self.rect.height = 64*self.scale
+        self.rect = self.image.get_rect(center=self.rect.center)
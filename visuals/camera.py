@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+import pygame
+
+import game_logic as gl
+
+# Колір кожного коду клітинки на мінікарті: відкриті числа, закрита клітинка, прапорець, міна
+MINIMAP_COLORS = np.array([(200, 190, 190)] * 9 + [(76, 220, 60), (230, 40, 40), (0, 0, 0)], dtype=np.uint8)
+
+
+class Camera:
+    """
+        Камера над полем: яка клітинка дошки показується в лівому верхньому куті вікна.
+        Кнопок на екрані рівно стільки, скільки вміщає вікно, тож їх кількість не залежить від розміру дошки
+    """
+    def __init__(self, columns: int, rows: int, board_columns: int, board_rows: int) -> None:
+        self.columns = columns
+        self.rows = rows
+        self.board_columns = board_columns
+        self.board_rows = board_rows
+        self.column = 0
+        self.row = 0
+
+        # Залишок перетягування мишею, менший за одну клітинку
+        self._drag = [0, 0]
+
+    def move_to(self, column: int, row: int) -> bool:
+        """
+            Ставить камеру в (column, row), не виходячи за межі дошки. Повертає, чи вона зрушила
+        """
+        column = min(max(column, 0), max(self.board_columns - self.columns, 0))
+        row = min(max(row, 0), max(self.board_rows - self.rows, 0))
+        moved = (column, row) != (self.column, self.row)
+        self.column, self.row = column, row
+        return moved
+
+    def pan(self, columns: int, rows: int) -> bool:
+        return self.move_to(self.column + columns, self.row + rows)
+
+    def center_on(self, column: int, row: int) -> bool:
+        return self.move_to(column - self.columns // 2, row - self.rows // 2)
+
+    def drag(self, dx: int, dy: int, tile_width: int, tile_height: int) -> bool:
+        """
+            Перетягування мишею: поле їде за курсором на цілі клітинки
+        """
+        self._drag[0] -= dx
+        self._drag[1] -= dy
+        columns = int(self._drag[0] / tile_width)
+        rows = int(self._drag[1] / tile_height)
+        self._drag[0] -= columns * tile_width
+        self._drag[1] -= rows * tile_height
+        return self.pan(columns, rows)
+
+    def to_board(self, cell: tuple) -> tuple:
+        return cell[0] + self.column, cell[1] + self.row
+
+    def to_view(self, column: int, row: int) -> tuple:
+        """
+            Клітинка вікна для клітинки дошки або None, якщо вона зараз не видна
+        """
+        column -= self.column
+        row -= self.row
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return column, row
+        return None
+
+
+class Minimap:
+    """
+        Зменшена карта всієї дошки з рамкою камери; кожен її піксель - одна клітинка з кроком step
+    """
+    def __init__(self, area: pygame.Rect, board_columns: int, board_rows: int) -> None:
+        self.step = max(1, math.ceil(max(board_columns / area.width, board_rows / area.height)))
+        width, height = math.ceil(board_columns / self.step), math.ceil(board_rows / self.step)
+        self.rect = pygame.Rect(0, 0, width, height)
+        self.rect.center = area.center
+        self.area = area
+
+    def draw(self, screen: pygame.surface.Surface, state: np.ndarray, camera: Camera,
+             bg_color) -> pygame.Rect:
+        """
+            Малює мінікарту з поточного стану дошки і повертає її область
+        """
+        sample = state[::self.step, ::self.step]
+        surface = pygame.surfarray.make_surface(MINIMAP_COLORS[sample])
+        screen.fill(bg_color, self.area)
+        screen.blit(surface, self.rect)
+        view = pygame.Rect(self.rect.x + camera.column // self.step, self.rect.y + camera.row // self.step,
+                           max(1, camera.columns // self.step), max(1, camera.rows // self.step))
+        pygame.draw.rect(screen, (255, 255, 255), view, 1)
+        return self.area
+
+    def to_board(self, pos: tuple) -> tuple:
+        """
+            Клітинка дошки під пікселем pos мінікарти
+        """
+        return (pos[0] - self.rect.x) * self.step, (pos[1] - self.rect.y) * self.step
+
+
+def refresh_view(grid, camera: Camera, game: gl.Game) -> list:
+    """
+        Переодягає всі кнопки вікна у клітинки, що зараз під камерою, і повертає їх
+    """
+    names = gl.CELL_NAMES[game.state[camera.column:camera.column + camera.columns,
+                                     camera.row:camera.row + camera.rows]]
+    changed_buttons = []
+    for column in range(grid.columns):
+        for row in range(grid.rows):
+            button = grid.cells[column * grid.rows + row]
+            image_name = str(names[column, row])
+            button.change_image(image_name)
+            button.is_revealed = image_name != 'default' and image_name != 'flag'
+            button.coords = (camera.row + row, camera.column + column)
+            changed_buttons.append(button)
+    return changed_buttons
@@ -12,7 +12,7 @@ class Display:
 
         self.icon = icon
 
-        self.example_image = pygame.image.load('images/0.1.png').convert()
+        self.example_image = self.game_settings.assets.get('0.1')
 
         self.rect1 = self.example_image.get_rect()
         self.rect2 = self.example_image.get_rect()
@@ -25,15 +25,22 @@ class Display:
         self.rect1.y, self.rect2.y, self.rect3.y, = y1, y1, y1
 
         self.counter = counter
+        # Чи треба перемалювати дисплей у режимі брудних прямокутників
+        self.changed = True
 
-    def blit_display(self) -> None:
+    def blit_display(self) -> pygame.Rect:
+        """
+            Малює дисплей і повертає зайняту ним область
+        """
+        self.changed = False
         if self.icon:
             self.icon.blit_me()
-        pygame.draw.rect(self.screen, (0, 0, 0),
-                         pygame.Rect(self.rect1.x-5, self.rect1.y-5, self.rect1.width*3+16, self.rect1.height+10))
-        self.screen.blit(pygame.image.load(f'images/{self.counter[0]}.1.png').convert(), self.rect1)
-        self.screen.blit(pygame.image.load(f'images/{self.counter[1]}.1.png').convert(), self.rect2)
-        self.screen.blit(pygame.image.load(f'images/{self.counter[2]}.1.png').convert(), self.rect3)
+        area = pygame.Rect(self.rect1.x-5, self.rect1.y-5, self.rect1.width*3+16, self.rect1.height+10)
+        pygame.draw.rect(self.screen, (0, 0, 0), area)
+        self.screen.blit(self.game_settings.assets.get(f'{self.counter[0]}.1'), self.rect1)
+        self.screen.blit(self.game_settings.assets.get(f'{self.counter[1]}.1'), self.rect2)
+        self.screen.blit(self.game_settings.assets.get(f'{self.counter[2]}.1'), self.rect3)
+        return area.union(self.icon.rect) if self.icon else area
 
     def display_plus_one(self) -> None:
         self.counter = [int(i) for i in str(int(''.join([str(i) for i in self.counter])) + 1)]
@@ -41,11 +48,19 @@ class Display:
             self.counter.insert(0, 0)
         if self.counter[0] == 9 and self.counter[1] == 9 and self.counter[2] == 9:
             self.counter = [0, 0, 0]
+        self.changed = True
 
     def display_minus_one(self) -> None:
         self.counter = [int(i) for i in str(int(''.join([str(i) for i in self.counter])) - 1)]
         while len(self.counter) != 3:
             self.counter.insert(0, 0)
+        self.changed = True
+
+    def set_number(self, number: int) -> None:
+        counter = [number // 100 % 10, number // 10 % 10, number % 10]
+        if counter != self.counter:
+            self.counter = counter
+            self.changed = True
 
     def got_mines(self) -> bool:
         for i in self.counter:
@@ -55,3 +70,4 @@ class Display:
 
     def change_icon(self, icon: Icon) -> None:
         self.icon = icon
+        self.changed = True
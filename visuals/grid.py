@@ -0,0 +1,40 @@
+from button import Button
+
+
+class GridIndex:
+    """
+        Сітка ігрового поля: переводить координати пікселя в клітинку арифметично
+        і зберігає кнопки в плоскому списку за індексом клітинки (column * rows + row),
+        тож пошук кнопки під мишею не залежить від розміру поля
+    """
+    def __init__(self, left: int, top: int, tile_width: int, tile_height: int,
+                 columns: int, rows: int) -> None:
+        self.left = left
+        self.top = top
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.columns = columns
+        self.rows = rows
+        self.cells = [None] * (columns * rows)
+
+        # Кнопка, над якою зараз миша
+        self.hovered = None
+
+    def add(self, button: Button, column: int, row: int) -> None:
+        self.cells[column * self.rows + row] = button
+
+    def cell_at(self, pos: tuple) -> tuple:
+        """
+            Повертає (column, row) клітинки під пікселем pos або None, якщо він поза полем
+        """
+        column = (pos[0] - self.left) // self.tile_width
+        row = (pos[1] - self.top) // self.tile_height
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return int(column), int(row)
+        return None
+
+    def button_at(self, pos: tuple) -> Button:
+        cell = self.cell_at(pos)
+        if cell is None:
+            return None
+        return self.cells[cell[0] * self.rows + cell[1]]
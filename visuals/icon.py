@@ -3,9 +3,9 @@ from settings import Settings
 
 
 class Icon:
-    def __init__(self, image_path: str, screen: pygame.surface.Surface,
+    def __init__(self, image_name: str, screen: pygame.surface.Surface,
                  game_settings: Settings, x: int, y: int) -> None:
-        self.image = pygame.image.load(image_path)
+        self.image = game_settings.assets.get(image_name, alpha=True)
         self.screen = screen
         self.game_settings = game_settings
         self.rect = self.image.get_rect()
@@ -1,18 +1,31 @@
+import time
+# Відлік для --startup-profile, до імпорту pygame
+_STARTED = time.perf_counter()
+
+import argparse
 from os import environ
 from sys import exit
 
 import numpy as np
+
 import pygame
 from pygame.locals import *
 from pygame.sprite import Group
 
 import game_logic as gl
+from assets import DIGIT_IMAGES, HUD_IMAGES, TILE_IMAGES
 from button import Button, NewGameButton
+from camera import Camera, Minimap, refresh_view
 from display import Display
+from grid import GridIndex
 from icon import Icon
+from profiler import FrameProfiler, StartupProfiler
+from replay import EventRecorder, EventReplayer
 from settings import Settings
 
 TIME_STEP = 1./60.
+# Подія таймера, що раз на секунду будить цикл гри для оновлення годинника
+CLOCK_TICK = pygame.USEREVENT + 1
 
 def _get_number_buttons_x(game_settings: Settings, button_width: int) -> int:
     """
@@ -35,7 +48,7 @@ def _get_number_rows(game_settings: Settings, button_height: int) -> int:
 
 
 def _create_field(game_settings: Settings, screen: pygame.surface.Surface,
-                  buttons: Group, button_number: int, row_number: int,
+                  buttons: Group, grid: GridIndex, button_number: int, row_number: int,
                   actual_image: str) -> None:
     # Екземпляр кнопки
     button = Button(game_settings, screen, actual_image,
@@ -50,36 +63,61 @@ def _create_field(game_settings: Settings, screen: pygame.surface.Surface,
     button.rect.x = button.x
     button.rect.y = button.y
 
-    # Додаємо кнопку до списку кнопок Group
+    # Додаємо кнопку до списку кнопок Group та до сітки
     buttons.add(button)
+    grid.add(button, button_number, row_number)
 
 
-def create_game_field(game_settings: Settings, screen: pygame.surface.Surface, buttons: Group) -> None:
+def create_game_field(game_settings: Settings, screen: pygame.surface.Surface, buttons: Group) -> GridIndex:
     # Екземпляр кнопки
     button = Button(game_settings, screen)
 
-    # Прораховуєм кількість кнопок в одному рядку і саму кількість рядків
-    number_buttons_x = _get_number_buttons_x(game_settings, button.rect.width)
-    number_rows = _get_number_rows(game_settings, button.rect.height)
+    # Прораховуєм кількість кнопок в одному рядку і саму кількість рядків, але не більше, ніж клітинок на дошці
+    number_buttons_x = max(1, min(_get_number_buttons_x(game_settings, button.rect.width), game_settings.x))
+    number_rows = max(1, min(_get_number_rows(game_settings, button.rect.height), game_settings.y))
+
+    # Сітка з тим самим розташуванням, що й у _create_field
+    grid = GridIndex(int(game_settings.extra_x / 2), button.rect.height + 86,
+                     button.rect.width, button.rect.height, number_buttons_x, number_rows)
 
     # Створюєм ришітку кнопок - ігрове поле
     for button_number in range(number_buttons_x):
         for row_number in range(number_rows):
-            _create_field(game_settings, screen, buttons, button_number,
+            _create_field(game_settings, screen, buttons, grid, button_number,
                           row_number, '0')
+    return grid
 
 
-def change_game_fields(buttons: Group,
-                       array_2d: np.ndarray) -> None:
-    # Екземпляр кнопки
-    for x in range(0, array_2d.shape[0]):
-        for y in range(0, array_2d.shape[1]):
-            buttons.sprites()[y + x * array_2d.shape[1]].change_image(array_2d[x, y])
-            if array_2d[x, y] != 'default' and array_2d[x, y] != 'flag':
-                buttons.sprites()[y + x * array_2d.shape[1]].is_revealed = True
+def change_game_fields(grid: GridIndex, game: gl.Game, camera: Camera) -> list:
+    """
+        Оновлює лише ті клітинки, стан яких змінився після останньої дії, і повертає їх.
+        Клітинки поза камерою пропускаються: refresh_view візьме їх зі стану гри, коли камера до них доїде
+    """
+    changed_buttons = []
+    for index in game.pop_changes().tolist():
+        pos = divmod(index, game.size[1])
+        cell = camera.to_view(*pos)
+        if cell is None:
+            continue
+        button = grid.cells[cell[0] * grid.rows + cell[1]]
+        image_name = game.cell_name(pos)
+        button.change_image(image_name)
+        if image_name != 'default' and image_name != 'flag':
+            button.is_revealed = True
+        changed_buttons.append(button)
+    return changed_buttons
+
+
+def _blit_buttons(screen: pygame.surface.Surface, changed_buttons: list) -> list:
+    """
+        Малює лише змінені кнопки та повертає прямокутники для pygame.display.update
+    """
+    for button in changed_buttons:
+        screen.blit(button.image, button.rect)
+    return [button.rect for button in changed_buttons]
 
 
-def _button_keydown(event, buttons: Group, game_settings: Settings, game: gl.Game, mines_display,
+def _button_keydown(event, grid: GridIndex, game_settings: Settings, game: gl.Game, mines_display,
                     begin_game_button: NewGameButton, success_game_button: NewGameButton) -> tuple:
     """
         Обробник помилок для ігрового поля (кнопок)
@@ -89,121 +127,270 @@ def _button_keydown(event, buttons: Group, game_settings: Settings, game: gl.Gam
             game_settings.game_active = True
             game.end_game = False
     else:
-        for button in buttons.sprites():
-            if button.rect.collidepoint(event.pos):
-                if event.button == 1 and button.image_name != 'flag' and not button.is_revealed:
-                    print(button.actual_image)
-                    if button.actual_image == 'mine':
-                        pygame.mixer.Sound.play(game_settings.explosion_sound)
+        button = grid.button_at(event.pos)
+        if button:
+            if event.button == 1 and button.image_name != 'flag' and not button.is_revealed:
+                print(button.actual_image)
+                if button.actual_image == 'mine':
+                    pygame.mixer.Sound.play(game_settings.explosion_sound)
+                    pygame.mixer.music.stop()
+                    game_settings.game_active = False
+                else:
+                    # Зображення не міняємо тут: change_game_fields бере його зі стану гри після do_action
+                    pygame.mixer.Sound.play(game_settings.click_sound)
+                    pygame.mixer.music.stop()
+                coords = button.get_coords()
+                return (coords[1], coords[0]), 'o'
+
+            elif event.button == 3:
+                if not button.is_revealed:
+                    if button.image_name == 'flag':
+                        pygame.mixer.Sound.play(game_settings.flag_sound_backwards)
                         pygame.mixer.music.stop()
-                        game_settings.game_active = False
-                    else:
-                        button.on_click()
-                        pygame.mixer.Sound.play(game_settings.click_sound)
+                        mines_display.display_plus_one()
+                        button.change_image('default')
+                        coords = button.get_coords()
+                        return (coords[1], coords[0]), 'r'
+
+                    elif mines_display.got_mines():
+                        pygame.mixer.Sound.play(game_settings.flag_sound)
                         pygame.mixer.music.stop()
-                    coords = button.get_coords()
-                    return (coords[1], coords[0]), 'o'
-
-                elif event.button == 3:
-                    if not button.is_revealed:
-                        if button.image_name == 'flag':
-                            pygame.mixer.Sound.play(game_settings.flag_sound_backwards)
-                            pygame.mixer.music.stop()
-                            mines_display.display_plus_one()
-                            button.change_image('default')
-                            coords = button.get_coords()
-                            return (coords[1], coords[0]), 'r'
-
-                        elif mines_display.got_mines():
-                            pygame.mixer.Sound.play(game_settings.flag_sound)
-                            pygame.mixer.music.stop()
-                            mines_display.display_minus_one()
-                            button.change_image('flag')
-                            coords = button.get_coords()
-                            return (coords[1], coords[0]), 'f'
-
-
-def buttons_hover(buttons: Group, start_game_buttons: Group):
+                        mines_display.display_minus_one()
+                        button.change_image('flag')
+                        coords = button.get_coords()
+                        return (coords[1], coords[0]), 'f'
+
+
+def buttons_hover(grid: GridIndex, start_game_buttons: Group, mouse_pos: tuple) -> tuple:
+    """
+        Анімує наведення і повертає кнопки поля, у яких воно змінилось, та чи змінились заставки
+    """
+    start_buttons_changed = False
     for button in start_game_buttons.sprites():
-        if button.rect.collidepoint(pygame.mouse.get_pos()):
-            button.hover()
-        else:
-            button.stop_hover()
-    for button in buttons.sprites():
-        if button.rect.collidepoint(pygame.mouse.get_pos()):
+        if button.rect.collidepoint(mouse_pos) != button.is_hover:
+            start_buttons_changed = True
+        if button.rect.collidepoint(mouse_pos):
             button.hover()
         else:
             button.stop_hover()
 
+    # Наведення може змінитись лише у попередньої кнопки під мишею та у поточної
+    changed_buttons = []
+    button = grid.button_at(mouse_pos)
+    if grid.hovered and grid.hovered is not button and grid.hovered.is_hover:
+        grid.hovered.stop_hover()
+        changed_buttons.append(grid.hovered)
+    if button and not button.is_hover:
+        button.hover()
+        changed_buttons.append(button)
+    grid.hovered = button
+    return changed_buttons, start_buttons_changed
+
 
-def event_handler(buttons: Group, game_settings: Settings, mines_display: Display, begin_game_button: NewGameButton,
-                  game, success_game_button: NewGameButton) -> tuple:
+def _zoom_handler(event, game_settings: Settings) -> bool:
+    """
+        Масштаб: Ctrl з коліщатком, +/- на клавіатурі. Повертає, чи змінився розмір клітинки
+    """
+    if event.type == MOUSEWHEEL and pygame.key.get_mods() & KMOD_CTRL:
+        return game_settings.zoom(1 if event.y > 0 else -1) if event.y else False
+    elif event.type == KEYDOWN:
+        if event.key in (K_PLUS, K_EQUALS, K_KP_PLUS):
+            return game_settings.zoom(1)
+        elif event.key in (K_MINUS, K_KP_MINUS):
+            return game_settings.zoom(-1)
+    return False
+
+
+def _pan_handler(event, grid: GridIndex, game_settings: Settings) -> bool:
+    """
+        Рух камери: стрілки (з Shift - на цілий екран), коліщатко (з Shift - вбік),
+        перетягування середньою кнопкою миші та клік по мінікарті. Повертає, чи камера зрушила
+    """
+    camera = game_settings.camera
+    if event.type == KEYDOWN:
+        step_x, step_y = (camera.columns, camera.rows) if event.mod & KMOD_SHIFT else (1, 1)
+        moves = {K_LEFT: (-step_x, 0), K_RIGHT: (step_x, 0), K_UP: (0, -step_y), K_DOWN: (0, step_y)}
+        return camera.pan(*moves[event.key]) if event.key in moves else False
+    elif event.type == MOUSEWHEEL:
+        if pygame.key.get_mods() & KMOD_SHIFT:
+            return camera.pan(-event.y, 0)
+        return camera.pan(event.x, -event.y)
+    elif event.type == MOUSEMOTION:
+        return event.buttons[1] and camera.drag(event.rel[0], event.rel[1], grid.tile_width, grid.tile_height)
+    elif event.type == MOUSEBUTTONDOWN:
+        minimap = game_settings.minimap
+        if event.button == 1 and minimap and minimap.rect.collidepoint(event.pos):
+            return camera.center_on(*minimap.to_board(event.pos))
+    return False
+
+
+def event_handler(grid: GridIndex, game_settings: Settings, mines_display: Display, begin_game_button: NewGameButton,
+                  game, success_game_button: NewGameButton, events: list = None) -> tuple:
     """
         Головний обробник помилок у грі
     """
-    for event in pygame.event.get():
+    for event in events if events is not None else pygame.event.get():
         if event.type == QUIT:
             pygame.quit()
             exit()
+        elif event.type == VIDEORESIZE:
+            game_settings.resize(event.w, event.h)
+            game_settings.layout_changed = True
+        elif _zoom_handler(event, game_settings):
+            game_settings.layout_changed = True
+        elif _pan_handler(event, grid, game_settings):
+            game_settings.view_moved = True
         elif event.type == MOUSEBUTTONDOWN:
-            return _button_keydown(event, buttons, game_settings, game, mines_display, begin_game_button, success_game_button)
+            return _button_keydown(event, grid, game_settings, game, mines_display, begin_game_button, success_game_button)
         elif event.type == pygame.MOUSEBUTTONUP:
             pass
         elif event.type == KEYDOWN:
             if event.key == K_ESCAPE:
                 pygame.quit()
                 exit()
+            elif event.key == K_F3 and game_settings.profile:
+                game_settings.show_profile = not game_settings.show_profile
 
 
-def load_image(game: gl.Game):
-    # Ініціалізація pygame
+def _ticks(game_settings: Settings) -> int:
+    """
+        Мілісекунди pygame.time.get_ticks(), а при відтворенні - записаний час поточного кадру
+    """
+    if game_settings.replay:
+        return game_settings.replay.ticks
+    return pygame.time.get_ticks()
+
+
+def _played_seconds(game_settings: Settings) -> int:
+    """
+        Час гри в секундах за годинником pygame, тож пропущені кадри не збивають дисплей
+    """
+    played_ms = game_settings.played_ms
+    if game_settings.active_since is not None:
+        played_ms += _ticks(game_settings) - game_settings.active_since
+    return played_ms // 1000
+
+
+def _toggle_game_clock(game_settings: Settings) -> None:
+    """
+        Запускає секундний таймер на час гри і зупиняє його на заставках
+    """
+    if game_settings.game_active:
+        game_settings.active_since = _ticks(game_settings)
+        pygame.time.set_timer(CLOCK_TICK, 1000)
+    else:
+        game_settings.played_ms += _ticks(game_settings) - game_settings.active_since
+        game_settings.active_since = None
+        pygame.time.set_timer(CLOCK_TICK, 0)
+
+
+def _startup_mark(startup: StartupProfiler, phase: str) -> None:
+    if startup:
+        startup.mark(phase)
+
+
+def _open_window(game: gl.Game, startup: StartupProfiler = None) -> tuple:
+    """
+        Відкриває вікно гри, одразу показує перший кадр і повертає (screen, game_settings)
+    """
+    _startup_mark(startup, 'import')
+    # Ініціалізуємо лише ті модулі pygame, що потрібні грі, замість pygame.init();
+    # мікшер відкриває Settings перед вікном, а звуки декодуються у фоні
     pygame.mixer.pre_init(44100, 16, 2, 4096)
-    pygame.init()
+    pygame.display.init()
+    pygame.font.init()
     pygame.display.set_caption('Minesweeper')
     pygame.display.set_icon(pygame.image.load('images/mine.png'))
+    _startup_mark(startup, 'init')
 
     game_settings = Settings(game.size[0], game.size[1], game.num_of_mines, 32, 32, 20, 192)
+    game_settings.startup = startup
+    _startup_mark(startup, 'settings')
     flags = DOUBLEBUF | RESIZABLE
     screen = pygame.display.set_mode((game_settings.screen_width, game_settings.screen_height - game_settings.extra_y / 3), flags, 16)
+    _startup_mark(startup, 'window')
+
+    # Перший кадр показуємо одразу, ще до шрифту і зображень
+    bg_color = (0, 0, 0)
+    screen.fill(bg_color)
+    pygame.display.flip()
+    _startup_mark(startup, 'first_frame')
+
+    # Поки гравець шукає зображення, PNG гри декодуються у фоні
+    game_settings.assets.decode_async(TILE_IMAGES + DIGIT_IMAGES + HUD_IMAGES)
+    return screen, game_settings
+
+
+def load_image(game: gl.Game, startup: StartupProfiler = None):
+    screen, game_settings = _open_window(game, startup)
 
     # Обмежуєм кількість можливих кнопок, які можна натиснути. ОПТИМІЗАЦІЯ
     pygame.event.set_allowed([QUIT, KEYDOWN, KEYUP, K_ESCAPE, MOUSEBUTTONDOWN, MOUSEBUTTONUP])
-    font = pygame.font.SysFont('arial', 22, bold=True)
+    font = game_settings.assets.font('arial', 22, bold=True)
     text = 'Перетягніть зображення до екрану, щоб почати розмінування'
     color_black = (255, 255, 255)
     text_image = font.render(text, True, color_black)
     text_rect = text_image.get_rect()
     text_rect.center = (screen.get_width() // 2, screen.get_height() // 2)
-    bg_color = (0, 0, 0)
 
+    # Малюєм підказку один раз і далі спимо до наступної події, а не крутимо цикл
+    bg_color = (0, 0, 0)
+    redraw = True
+    prompt_shown = False
     while 1:
-        screen.fill(bg_color)
-        screen.blit(text_image, text_rect)
-        for event in pygame.event.get():
-            if event.type == DROPFILE:
-                image = pygame.image.load(event.file)
-                return image, screen, game_settings
-            elif event.type == QUIT:
-                pygame.quit()
-                exit()
-        pygame.display.flip()
+        if redraw:
+            screen.fill(bg_color)
+            screen.blit(text_image, text_rect)
+            pygame.display.flip()
+            if not prompt_shown:
+                _startup_mark(startup, 'prompt')
+                prompt_shown = True
+        event = pygame.event.wait()
+        if event.type == DROPFILE:
+            image = pygame.image.load(event.file)
+            _startup_mark(startup, 'wait_for_drop')
+            return image, screen, game_settings
+        elif event.type == QUIT:
+            pygame.quit()
+            exit()
+        redraw = event.type in (VIDEOEXPOSE, VIDEORESIZE, WINDOWEXPOSED, WINDOWSIZECHANGED)
 
-def run_game(game: gl.Game, parameters: tuple) -> None:
+
+def _next_events(game_settings: Settings, clock: pygame.time.Clock = None) -> list:
     """
-        Main func with game loop
+        Події наступного кадру: при відтворенні - записані, одразу й без clock.tick,
+        інакше чекаємо на ввід (без clock лише забираємо вже наявні події); при записі кадр подій іде ще й у файл
     """
-    pygame.display.set_icon(pygame.image.load("images/hover_mine.png"))
-    # Game sound optimization
-    game_settings = parameters[2]
-    # print(game_settings.)
-    # Налаштовування вікна гри
-    environ['SDL_VIDEO_CENTERED'] = '1'
-    screen = parameters[1]
-    # print(screen.get_width(), game_settings.screen_width)
-    clock = pygame.time.Clock()
+    if game_settings.replay:
+        return game_settings.replay.next_events()
+    if clock:
+        # tick лише обмежує частоту, коли події йдуть безперервно
+        clock.tick(game_settings.frame_rate)
+        events = [pygame.event.wait()]
+        events += pygame.event.get()
+    else:
+        events = pygame.event.get()
+    if game_settings.recorder:
+        game_settings.recorder.record(events, pygame.time.get_ticks())
+    return events
 
-    # Створення ігрових об'єктів
-    buttons = Group()
+
+def _use_zoom_level(game_settings: Settings) -> None:
+    """
+        Бере з кешу клітинки поточного розміру і готує у фоні сусідні рівні масштабу,
+        тож у циклі гри pygame.transform.scale не викликається
+    """
+    levels = game_settings.zoom_levels
+    game_settings.tile_images = game_settings.tiles.get(game_settings.button_w)
+    if game_settings.button_w in levels:
+        index = levels.index(game_settings.button_w)
+        game_settings.tiles.prefetch(levels[max(index - 1, 0):index + 2])
+
+
+def _create_hud(game_settings: Settings, screen: pygame.surface.Surface, mines_counter: list) -> tuple:
+    """
+        Заставки і два дисплеї (час та кількість мін), розставлені під поточну ширину вікна
+    """
     start_game = NewGameButton(game_settings, screen, 'start',
                                game_settings.screen_width // 2, int(game_settings.screen_height // 2), 8)
     end_game = NewGameButton(game_settings, screen, 'lose',
@@ -220,57 +407,242 @@ def run_game(game: gl.Game, parameters: tuple) -> None:
                             [0, 0, 0])
     mines_display = Display(game_settings, screen,
                             game_settings.screen_width - 44 * 3 - game_settings.screen_width / 1.5, 20,
-                            [game_settings.mines // 100, (game_settings.mines // 10) % 10, game_settings.mines % 10])
+                            mines_counter)
 
     clock_display.change_icon(
-        Icon('images/clock.png', screen, game_settings, clock_display.rect1.x - 60, 15))
+        Icon('clock', screen, game_settings, clock_display.rect1.x - 60, 15))
     mines_display.change_icon(
-        Icon('images/flag64-1.png', screen, game_settings, mines_display.rect1.x - 60, 9))
+        Icon('flag64-1', screen, game_settings, mines_display.rect1.x - 60, 9))
+    return start_game, end_game, success_game, buttons_game_begin, clock_display, mines_display
+
+
+def _create_view(game_settings: Settings, screen: pygame.surface.Surface, game: gl.Game, buttons: Group,
+                 hud: tuple) -> GridIndex:
+    """
+        Кнопки поля під поточний розмір вікна і клітинки, камера над ними та мінікарта.
+        Камера лишається з тим самим центром, що й до зміни розміру чи масштабу
+    """
+    clock_display, mines_display = hud[4], hud[5]
+    buttons.empty()
+    grid = create_game_field(game_settings, screen, buttons)
+    # Кнопок рівно на вікно; якщо дошка більша, її показує камера, а мінікарта лягає між дисплеями
+    old_camera = game_settings.camera
+    game_settings.camera = Camera(grid.columns, grid.rows, game.size[0], game.size[1])
+    if old_camera:
+        game_settings.camera.center_on(old_camera.column + old_camera.columns // 2,
+                                       old_camera.row + old_camera.rows // 2)
+    game_settings.minimap = None
+    if grid.columns < game.size[0] or grid.rows < game.size[1]:
+        minimap_left = mines_display.rect3.right + 16
+        minimap_right = clock_display.icon.rect.x - 16
+        game_settings.minimap = Minimap(pygame.Rect(minimap_left, 10, max(minimap_right - minimap_left, 1), 98),
+                                        game.size[0], game.size[1])
+    refresh_view(grid, game_settings.camera, game)
+    return grid
 
-    create_game_field(game_settings, screen, buttons)
+
+def run_game(game: gl.Game, parameters: tuple) -> None:
+    """
+        Main func with game loop
+    """
+    # Game sound optimization
+    game_settings = parameters[2]
+    pygame.display.set_icon(game_settings.assets.get('hover_mine', alpha=True))
+    # print(game_settings.)
+    # Налаштовування вікна гри
+    environ['SDL_VIDEO_CENTERED'] = '1'
+    screen = parameters[1]
+    # print(screen.get_width(), game_settings.screen_width)
+    clock = pygame.time.Clock()
+
+    # Завантажуєм усі зображення наперед, щоб у циклі гри не було читання з диска
+    _use_zoom_level(game_settings)
+    game_settings.assets.preload(DIGIT_IMAGES)
+    _startup_mark(game_settings.startup, 'assets')
+
+    # Створення ігрових об'єктів
+    buttons = Group()
+    hud = _create_hud(game_settings, screen, [game_settings.mines // 100 % 10, (game_settings.mines // 10) % 10,
+                                              game_settings.mines % 10])
+    start_game, end_game, success_game, buttons_game_begin, clock_display, mines_display = hud
+    grid = _create_view(game_settings, screen, game, buttons, hud)
     screen.fill(game_settings.bg_color)
 
     accumulator = 0.0
     current_time = pygame.time.get_ticks() * 0.001
-
-    # Game cycle
-    while True:
-        if game.end_game:
-            if game.game_won:
-                game_settings.game_won = True
-            game_settings.game_active = False
-            game_settings.first_time_play = False
-        event_result = event_handler(buttons, game_settings, mines_display, start_game, game, success_game)
-        if event_result:
-            game.do_action(event_result[0], event_result[1])
-            change_game_fields(buttons, game.player_board)
-
-        # Update displays
-        clock_display.blit_display()
-        mines_display.blit_display()
-
-        buttons.draw(screen)
-        buttons_hover(buttons, buttons_game_begin)
-        if not game_settings.game_active:
-            if game_settings.first_time_play:
-                start_game.draw_me()
-            elif game_settings.game_won:
-                success_game.draw_me()
+    # Після старту та при появі/зникненні заставок перемальовуємо все вікно
+    redraw_all = True
+    was_active = game_settings.game_active
+    was_showing_profile = game_settings.show_profile
+
+    # Профайлер створюється лише на вимогу, тож без нього цикл не робить жодних замірів
+    # При відтворенні вікно перцентилів охоплює всі кадри запису
+    window = len(game_settings.replay.batches) + 1 if game_settings.replay else 600
+    profiler = FrameProfiler(game_settings.assets, window) if game_settings.profile else None
+
+    # Наведення йде за останньою позицією миші з подій, тож відтворення не залежить від справжнього курсора;
+    # початкову позицію запис зберігає в заголовку, а відтворення бере звідти
+    if game_settings.replay:
+        mouse_pos = game_settings.replay.mouse_pos
+    else:
+        mouse_pos = pygame.mouse.get_pos()
+        if game_settings.recorder:
+            game_settings.recorder.start(mouse_pos)
+
+    # Game cycle: кадр малюється лише після вводу або події таймера
+    events = _next_events(game_settings)
+    try:
+        while True:
+            if profiler:
+                profiler.start_frame()
+            if game.end_game:
+                if game.game_won:
+                    game_settings.game_won = True
+                game_settings.game_active = False
+                game_settings.first_time_play = False
+            changed_buttons = []
+            event_result = event_handler(grid, game_settings, mines_display, start_game, game, success_game, events)
+            if profiler:
+                profiler.mark('events')
+            minimap_changed = game_settings.view_moved
+            if game_settings.layout_changed:
+                # Зміна розміру вікна чи масштабу: нові кнопки поля та HUD, а клітинки беруться з готового набору
+                game_settings.layout_changed = False
+                screen = pygame.display.get_surface()
+                _use_zoom_level(game_settings)
+                hud = _create_hud(game_settings, screen, mines_display.counter)
+                start_game, end_game, success_game, buttons_game_begin, clock_display, mines_display = hud
+                grid = _create_view(game_settings, screen, game, buttons, hud)
+                game_settings.view_moved = False
+                screen.fill(game_settings.bg_color)
+                redraw_all = True
+            if event_result:
+                game.do_action(event_result[0], event_result[1])
+                if profiler:
+                    profiler.mark('logic')
+                changed_buttons += change_game_fields(grid, game, game_settings.camera)
+                minimap_changed = True
+            if game_settings.view_moved:
+                game_settings.view_moved = False
+                changed_buttons += refresh_view(grid, game_settings.camera, game)
+            if profiler:
+                profiler.mark('field')
+
+            for event in events:
+                if hasattr(event, 'pos'):
+                    mouse_pos = event.pos
+            hovered_buttons, overlay_changed = buttons_hover(grid, buttons_game_begin, mouse_pos)
+            changed_buttons += hovered_buttons
+            if game_settings.game_active != was_active:
+                _toggle_game_clock(game_settings)
+            if game_settings.game_active:
+                clock_display.set_number(_played_seconds(game_settings) % 999)
+            if game_settings.game_active != was_active or game_settings.show_profile != was_showing_profile:
+                was_active = game_settings.game_active
+                was_showing_profile = game_settings.show_profile
+                redraw_all = True
+            if profiler:
+                profiler.mark('hover')
+
+            if not game_settings.game_active:
+                if game_settings.first_time_play:
+                    overlay = start_game
+                elif game_settings.game_won:
+                    overlay = success_game
+                else:
+                    overlay = end_game
             else:
-                end_game.draw_me()
-        else:
-            if game_settings.frame_count % game_settings.frame_rate == 0:
-                clock_display.display_plus_one()
-
-        # Лічильник кадрів
-        game_settings.frame_count += 1
-        clock.tick(game_settings.frame_rate)
-        pygame.display.flip()
-
-        # Оновлення екрану
+                overlay = None
+
+            full_frame = redraw_all or not game_settings.dirty_rendering
+            dirty_rects = []
+            for display in (clock_display, mines_display):
+                if full_frame or display.changed:
+                    dirty_rects.append(display.blit_display())
+            if profiler:
+                profiler.count_blits(4 * len(dirty_rects))
+            if game_settings.minimap and (full_frame or minimap_changed):
+                dirty_rects.append(game_settings.minimap.draw(screen, game.state, game_settings.camera,
+                                                              game_settings.bg_color))
+                if profiler:
+                    profiler.count_blits(1)
+            if profiler:
+                profiler.mark('hud')
+
+            if full_frame:
+                buttons.draw(screen)
+                if overlay:
+                    overlay.draw_me()
+                if profiler:
+                    profiler.count_blits(len(buttons) + (1 if overlay else 0))
+            else:
+                dirty_rects += _blit_buttons(screen, changed_buttons)
+                if profiler:
+                    profiler.count_blits(len(changed_buttons))
+                if overlay and (len(dirty_rects) or overlay_changed):
+                    # Заставка лежить поверх поля, тож перемальовуємо клітинки під нею і саму заставку
+                    covered_buttons = pygame.sprite.spritecollide(overlay, buttons, False)
+                    dirty_rects += _blit_buttons(screen, covered_buttons)
+                    overlay.draw_me()
+                    dirty_rects.append(overlay.rect)
+                    if profiler:
+                        profiler.count_blits(len(covered_buttons) + 1)
+            if profiler and game_settings.show_profile:
+                dirty_rects.append(profiler.draw_overlay(screen))
+            if profiler:
+                profiler.mark('draw')
+
+            if full_frame:
+                pygame.display.flip()
+                redraw_all = False
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
+            if profiler:
+                profiler.mark('flip')
+                profiler.end_frame()
+            if game_settings.startup and game_settings.frame_count == 0:
+                game_settings.startup.mark('game_frame')
+                print(game_settings.startup.report())
+
+            # Лічильник кадрів
+            game_settings.frame_count += 1
+            events = _next_events(game_settings, clock)
+    finally:
+        if game_settings.recorder:
+            game_settings.recorder.close()
+        if profiler and game_settings.replay:
+            print(game_settings.replay.report(profiler))
+        if profiler and game_settings.profile_dump:
+            profiler.dump(game_settings.profile_dump)
 
 
 # Play game
 if __name__ == '__main__':
-    game_instance = gl.Game((18, 14), 40)
-    run_game(game_instance, load_image(game_instance))
+    parser = argparse.ArgumentParser(description='Minesweeper')
+    parser.add_argument('--profile', action='store_true', help='заміряти етапи кадру (F3 показує таблицю)')
+    parser.add_argument('--profile-dump', help='файл, у який записати статистику кадрів при виході')
+    parser.add_argument('--startup-profile', action='store_true', help='вивести час кожної фази запуску')
+    parser.add_argument('--record', help='файл, у який записати ввід гри для --replay')
+    parser.add_argument('--replay', help='відтворити записаний ввід без вікна і звуку та вивести fps, '
+                                         'перцентилі кадру і кількість блітів')
+    args = parser.parse_args()
+
+    startup = StartupProfiler(_STARTED) if args.startup_profile else None
+    if args.replay:
+        # Відтворення працює без дисплея: SDL малює в пам'ять, а звук нікуди не йде
+        environ['SDL_VIDEODRIVER'] = 'dummy'
+        environ['SDL_AUDIODRIVER'] = 'dummy'
+        replay = EventReplayer(args.replay)
+        game_instance = gl.Game(replay.size, replay.mines, replay.seed)
+        parameters = (None,) + _open_window(game_instance, startup)
+        parameters[2].replay = replay
+    else:
+        # Зерно задаємо явно, щоб запис відтворював ту саму дошку
+        seed = int(np.random.SeedSequence().entropy)
+        game_instance = gl.Game((18, 14), 40, seed)
+        parameters = load_image(game_instance, startup)
+        if args.record:
+            parameters[2].recorder = EventRecorder(args.record, game_instance.size, game_instance.num_of_mines, seed)
+    parameters[2].profile = args.profile or bool(args.profile_dump) or bool(args.replay)
+    parameters[2].profile_dump = args.profile_dump
+    run_game(game_instance, parameters)
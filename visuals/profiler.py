@@ -0,0 +1,125 @@
+import json
+import time
+from collections import deque
+
+import pygame
+
+from assets import Assets
+
+# Етапи кадру в тому порядку, в якому їх проходить run_game
+STAGES = ('events', 'logic', 'field', 'hover', 'hud', 'draw', 'flip')
+# Межі кошиків гістограми тривалості, мс
+HISTOGRAM_EDGES_MS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33, 66)
+
+
+class FrameProfiler:
+    """
+        Вимірює тривалість кожного етапу кадру, кількість блітів і завантажень зображень,
+        тримає ковзні перцентилі за останні window кадрів та гістограми за весь запуск
+    """
+    def __init__(self, assets: Assets, window: int = 600) -> None:
+        self.assets = assets
+        self.window = window
+        self.samples = {stage: deque(maxlen=window) for stage in STAGES + ('frame',)}
+        self.histograms = {stage: [0] * (len(HISTOGRAM_EDGES_MS) + 1) for stage in STAGES + ('frame',)}
+        self.blits = deque(maxlen=window)
+        self.loads = deque(maxlen=window)
+        self.frames = 0
+        self.total_blits = 0
+        self.font = assets.font(None, 18)
+
+        self._frame_start = self._last_mark = 0.0
+        self._frame_blits = 0
+        self._frame_loads = 0
+
+    def _record(self, stage: str, milliseconds: float) -> None:
+        self.samples[stage].append(milliseconds)
+        bucket = 0
+        while bucket < len(HISTOGRAM_EDGES_MS) and milliseconds > HISTOGRAM_EDGES_MS[bucket]:
+            bucket += 1
+        self.histograms[stage][bucket] += 1
+
+    def start_frame(self) -> None:
+        self._frame_start = self._last_mark = time.perf_counter()
+        self._frame_blits = 0
+        self._frame_loads = self.assets.disk_loads + self.assets.scales
+
+    def mark(self, stage: str) -> None:
+        """
+            Закриває етап stage: записує час від попередньої позначки
+        """
+        now = time.perf_counter()
+        self._record(stage, (now - self._last_mark) * 1000)
+        self._last_mark = now
+
+    def count_blits(self, count: int) -> None:
+        self._frame_blits += count
+
+    def end_frame(self) -> None:
+        self._record('frame', (time.perf_counter() - self._frame_start) * 1000)
+        self.blits.append(self._frame_blits)
+        self.total_blits += self._frame_blits
+        self.loads.append(self.assets.disk_loads + self.assets.scales - self._frame_loads)
+        self.frames += 1
+
+    def percentiles(self, stage: str, points: tuple = (50, 95, 99)) -> list:
+        samples = sorted(self.samples[stage])
+        if not samples:
+            return [0.0] * len(points)
+        return [samples[min(len(samples) - 1, int(len(samples) * point / 100))] for point in points]
+
+    def summary(self) -> dict:
+        return {
+            'frames': self.frames,
+            'window': self.window,
+            'histogram_edges_ms': list(HISTOGRAM_EDGES_MS),
+            'stages': {stage: {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+                               'histogram': self.histograms[stage]}
+                       for stage in STAGES + ('frame',)
+                       for p50, p95, p99 in [self.percentiles(stage)]},
+            'blits_per_frame': sum(self.blits) / len(self.blits) if self.blits else 0,
+            'total_blits': self.total_blits,
+            'asset_loads_in_window': sum(self.loads),
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.summary(), file, indent=1)
+
+    def draw_overlay(self, screen: pygame.surface.Surface) -> pygame.Rect:
+        """
+            Малює таблицю p50/p95 по етапах у лівому верхньому куті та повертає її область
+        """
+        lines = [f'{stage:<7}{p50:6.2f}{p95:7.2f} ms'
+                 for stage in STAGES + ('frame',)
+                 for p50, p95 in [self.percentiles(stage, (50, 95))]]
+        lines.append(f'blits {self.blits[-1] if self.blits else 0}  loads {self.loads[-1] if self.loads else 0}')
+        images = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        area = pygame.Rect(0, 0, max(image.get_width() for image in images) + 8,
+                           sum(image.get_height() for image in images) + 8)
+        pygame.draw.rect(screen, (0, 0, 0), area)
+        y = 4
+        for image in images:
+            screen.blit(image, (4, y))
+            y += image.get_height()
+        return area
+
+
+class StartupProfiler:
+    """
+        Час кожної фази запуску від старту процесу до першого кадру гри
+    """
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.phases = []
+        self._last_mark = started
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last_mark) * 1000))
+        self._last_mark = now
+
+    def report(self) -> str:
+        lines = [f'{phase:<14}{milliseconds:8.1f} ms' for phase, milliseconds in self.phases]
+        lines.append(f'{"total":<14}{(self._last_mark - self.started) * 1000:8.1f} ms')
+        return '\n'.join(lines)
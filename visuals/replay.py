@@ -0,0 +1,91 @@
+import json
+import time
+
+import pygame
+
+from profiler import FrameProfiler
+
+
+def _plain(value):
+    """
+        Значення атрибута події у вигляді, придатному для JSON, або None, якщо його не зберегти
+    """
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (tuple, list)) and all(isinstance(item, (bool, int, float)) for item in value):
+        return list(value)
+    return None
+
+
+class EventRecorder:
+    """
+        Пише ввід гри у файл JSON Lines: у першому рядку розмір дошки, міни, зерно гри і початкова позиція миші,
+        далі по рядку на кадр - час pygame.time.get_ticks(), модифікатори клавіш і події кадру
+    """
+    def __init__(self, path: str, size: tuple, mines: int, seed: int) -> None:
+        self.file = open(path, 'w')
+        self.header = {'size': list(size), 'mines': mines, 'seed': seed}
+
+    def start(self, mouse_pos: tuple) -> None:
+        """
+            Пише заголовок; позиція миші відома лише перед циклом гри, коли вікно вже відкрите
+        """
+        self.file.write(json.dumps(dict(self.header, mouse=list(mouse_pos))) + '\n')
+
+    def record(self, events: list, ticks: int) -> None:
+        batch = []
+        for event in events:
+            attributes = {}
+            for key, value in event.dict.items():
+                value = _plain(value)
+                if value is not None:
+                    attributes[key] = value
+            batch.append([event.type, attributes])
+        line = {'t': ticks, 'mod': pygame.key.get_mods(), 'events': batch}
+        self.file.write(json.dumps(line, separators=(',', ':')) + '\n')
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class EventReplayer:
+    """
+        Віддає записані кадри подій по черзі без очікування, а після останнього - QUIT.
+        Годинник гри при цьому йде за записаним часом, тож кожне відтворення однакове
+    """
+    def __init__(self, path: str) -> None:
+        with open(path) as file:
+            header = json.loads(file.readline())
+            self.batches = [json.loads(line) for line in file if line.strip()]
+        self.size = tuple(header['size'])
+        self.mines = header['mines']
+        self.seed = header['seed']
+        # Миша до першої події руху, щоб наведення не залежало від справжнього курсора
+        self.mouse_pos = tuple(header['mouse'])
+        self.position = 0
+        self.ticks = 0
+        self.started = None
+        self.finished = None
+
+    def next_events(self) -> list:
+        if self.started is None:
+            self.started = time.perf_counter()
+        if self.position == len(self.batches):
+            self.finished = time.perf_counter()
+            return [pygame.event.Event(pygame.QUIT)]
+        batch = self.batches[self.position]
+        self.position += 1
+        self.ticks = batch['t']
+        pygame.key.set_mods(batch['mod'])
+        return [pygame.event.Event(event_type, {key: tuple(value) if isinstance(value, list) else value
+                                                for key, value in attributes.items()})
+                for event_type, attributes in batch['events']]
+
+    def report(self, profiler: FrameProfiler) -> str:
+        """
+            Кадри на секунду, перцентилі тривалості кадру та всі бліти за відтворення
+        """
+        seconds = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        p50, p95, p99 = profiler.percentiles('frame')
+        return (f'{profiler.frames} frames in {seconds:.3f} s: {profiler.frames / max(seconds, 1e-9):.1f} fps, '
+                f'frame p50 {p50:.3f} ms, p95 {p95:.3f} ms, p99 {p99:.3f} ms, {profiler.total_blits} blits')
@@ -1,11 +1,11 @@
-import pygame
+from assets import TILE_IMAGES, Assets, TileCache, load_sounds
 
 
 class Settings:
     """Settings class"""
 
     def __init__(self, x: int, y: int, mines: int, button_w: int = 64, button_h: int = 64,
-                 extra_x: int = 22, extra_y: int = 128) -> None:
+                 extra_x: int = 22, extra_y: int = 128, max_view_x: int = 40, max_view_y: int = 22) -> None:
         """Init the game settings"""
         # Screen settings
         self.game_active = False
@@ -16,24 +16,96 @@ class Settings:
         self.first_time_won = True
         self.x = x
         self.y = y
+        # Cell size in pixels; zoom switches it between the zoom levels
         self.button_w = button_w
         self.button_h = button_h
-        self.screen_width = x * 32 + extra_x
-        self.screen_height = y * 32 + extra_y
+        self.zoom_levels = (16, 24, 32, 48, 64)
+        # Bigger boards are shown through a camera, so the window holds at most max_view_x x max_view_y cells
+        self.view_x = min(x, max_view_x)
+        self.view_y = min(y, max_view_y)
+        self.screen_width = self.view_x * button_w + extra_x
+        self.screen_height = self.view_y * button_h + extra_y
         self.bg_color = '#139917'
 
-        # Sounds
-        self.explosion_sound = pygame.mixer.Sound("sounds/explosion.wav")
-        self.click_sound = pygame.mixer.Sound("sounds/click.wav")
-        self.flag_sound = pygame.mixer.Sound("sounds/flag.wav")
-        self.flag_sound_backwards = pygame.mixer.Sound("sounds/flag_backwards.wav")
+        # The mixer is opened here, before the window; sounds are decoded on a background thread and
+        # the properties below wait for them on first use
+        self.sounds = load_sounds()
 
-        # Font
-        self.font = pygame.font.Font(None, 52)
+        # Images and fonts
+        self.assets = Assets()
+        # Cell images pre-scaled per zoom level, and the set of the current one
+        self.tiles = TileCache(self.assets, TILE_IMAGES)
+        self.tile_images = None
 
         # Frames
         self.frame_rate = 60
         self.frame_count = 0
 
+        # Game clock: play time so far and the pygame.time.get_ticks() mark the running round started at
+        self.played_ms = 0
+        self.active_since = None
+        # Redraw only the changed cells and displays instead of the whole window
+        self.dirty_rendering = True
+
+        # Camera and minimap over the board, created by run_game
+        self.camera = None
+        self.minimap = None
+        self.view_moved = False
+        # Set when a resize or zoom needs the field and the HUD laid out again
+        self.layout_changed = False
+
+        # Profiling
+        self.profile = False
+        self.show_profile = False
+        self.profile_dump = None
+        # StartupProfiler of this run when --startup-profile is given
+        self.startup = None
+
+        # Input recording (--record) and replay (--replay): EventRecorder / EventReplayer of this run
+        self.recorder = None
+        self.replay = None
+
         # Mines count
         self.mines = mines
+
+    def resize(self, width: int, height: int) -> None:
+        """Adopt a new window size; the window is screen_height - extra_y / 3 pixels high"""
+        self.screen_width = width
+        self.screen_height = height + self.extra_y / 3
+        self._fit_view()
+
+    def zoom(self, step: int) -> bool:
+        """Move step zoom levels in or out; returns whether the cell size changed"""
+        levels = self.zoom_levels
+        current = min(range(len(levels)), key=lambda i: abs(levels[i] - self.button_w))
+        level = levels[min(max(current + step, 0), len(levels) - 1)]
+        if level == self.button_w:
+            return False
+        self.button_w = self.button_h = level
+        self._fit_view()
+        return True
+
+    def _fit_view(self) -> None:
+        # As many cells as the window holds at the current size, but no more than the board has
+        self.view_x = max(1, min(self.x, int((self.screen_width - self.extra_x) // self.button_w)))
+        self.view_y = max(1, min(self.y, int((self.screen_height - self.extra_y) // self.button_h)))
+
+    @property
+    def explosion_sound(self):
+        return self.sounds.result()['explosion_sound']
+
+    @property
+    def click_sound(self):
+        return self.sounds.result()['click_sound']
+
+    @property
+    def flag_sound(self):
+        return self.sounds.result()['flag_sound']
+
+    @property
+    def flag_sound_backwards(self):
+        return self.sounds.result()['flag_sound_backwards']
+
+    @property
+    def font(self):
+        return self.assets.font(None, 52)